@@ -0,0 +1,164 @@
+from array import array
+
+from convert import (
+    BlockType,
+    block_to_block_type,
+    block_to_html_node,
+    iter_blocks,
+    markdown_to_html_node,
+    text_to_children,
+)
+from leafnode import leaf_html
+from parentnode import ParentNode
+from parse import INLINE_SYNTAX
+
+# Documents of at least this many lines are rendered from a NodeArena;
+# below that the object tree's per-node overhead is too small to matter.
+ARENA_LINES = 10_000
+
+
+class NodeArena:
+    # An HTML tree stored as flat arrays in document (pre-)order instead of
+    # one object per node: node i has tag tags[i] (an index into tag_names),
+    # value values[i] (None for parent elements) and its subtree ends just
+    # before node ends[i]; a node whose subtree is just itself is a leaf.
+    # Leaf attributes are rare and kept in a sparse dict.
+    # A list item costs a few array slots rather than a ParentNode, a
+    # children list and a LeafNode per run of text.
+    def __init__(self):
+        self.tag_names = [None]
+        self.tag_ids = {None: 0}
+        self.tags = array("I")
+        self.values = []
+        self.ends = array("I")
+        self.props = {}
+        self.open_nodes = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def tag_id(self, tag):
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self.tag_ids[tag] = len(self.tag_names)
+            self.tag_names.append(tag)
+        return tag_id
+
+    def add(self, tag, value, props=None):
+        index = len(self.values)
+        self.tags.append(self.tag_id(tag))
+        self.values.append(value)
+        self.ends.append(index + 1)
+        if props:
+            self.props[index] = props
+        return index
+
+    def open(self, tag):
+        if tag is None:
+            raise ValueError("Parent node must have a tag")
+        index = self.add(tag, None)
+        self.open_nodes.append(index)
+        return index
+
+    def close(self):
+        index = self.open_nodes.pop()
+        end = len(self.values)
+        if end == index + 1:
+            raise ValueError("Parent node must have children")
+        self.ends[index] = end
+
+    def add_node(self, node):
+        # Copies an HTMLNode tree into the arena.
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                self.close()
+            elif isinstance(node, ParentNode):
+                self.open(node.tag)
+                if not node.children:
+                    raise ValueError("Parent node must have children")
+                stack.append(None)
+                stack.extend(reversed(node.children))
+            else:
+                self.add(node.tag, node.value, node.props)
+
+    def add_text(self, text):
+        # text_to_children without the leaf objects for plain text
+        if INLINE_SYNTAX.search(text) is None:
+            self.add(None, text)
+        else:
+            for child in text_to_children(text):
+                self.add(child.tag, child.value, child.props)
+
+    def iter_html(self):
+        if self.open_nodes:
+            raise ValueError("arena has unclosed elements")
+        tag_names = self.tag_names
+        tags = self.tags
+        values = self.values
+        ends = self.ends
+        props = self.props
+        closing = []
+        for index, value in enumerate(values):
+            while closing and closing[-1][0] == index:
+                yield closing.pop()[1]
+            tag = tag_names[tags[index]]
+            if ends[index] == index + 1:
+                yield leaf_html(tag, value, props.get(index))
+            else:
+                yield f"<{tag}>"
+                closing.append((ends[index], f"</{tag}>"))
+        while closing:
+            yield closing.pop()[1]
+
+    def to_html(self):
+        return "".join(self.iter_html())
+
+    def write_html(self, sink):
+        write = sink.write
+        for chunk in self.iter_html():
+            write(chunk)
+
+
+# list block type -> (tag, length of the item marker)
+LIST_BLOCKS = {
+    BlockType.ORDERED_LIST: ("ol", 3),
+    BlockType.UNORDERED_LIST: ("ul", 2),
+}
+
+
+def block_to_arena(block, arena):
+    # Lists are the blocks that grow wide, so their items go straight into
+    # the arena; other blocks are small and reuse the tree converters.
+    list_block = LIST_BLOCKS.get(block_to_block_type(block))
+    if list_block is None:
+        arena.add_node(block_to_html_node(block))
+        return
+    tag, marker = list_block
+    arena.open(tag)
+    for item in block.split("\n"):
+        arena.open("li")
+        arena.add_text(item[marker:])
+        arena.close()
+    arena.close()
+
+
+def markdown_to_arena(markdown):
+    # The arena counterpart of markdown_to_html_node; renders the same HTML.
+    arena = NodeArena()
+    arena.open("div")
+    for _, block in iter_blocks(markdown):
+        block_to_arena(block, arena)
+    if len(arena) == 1:
+        block_to_arena("", arena)
+    arena.close()
+    return arena
+
+
+def markdown_to_page_node(markdown):
+    # What pages are rendered from: an arena for long documents, whose wide
+    # lists are where the flat arrays save memory, and the tree otherwise.
+    if markdown.count("\n") >= ARENA_LINES:
+        return markdown_to_arena(markdown)
+    return markdown_to_html_node(markdown)
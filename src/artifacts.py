@@ -0,0 +1,179 @@
+import json
+from xml.sax.saxutils import escape
+
+from arena import NodeArena
+from writer import write_text_atomic
+
+SITEMAP_NAME = "sitemap.xml"
+FEED_NAME = "feed.xml"
+SEARCH_INDEX_NAME = "search.json"
+
+# Inline tags run into the surrounding text; every other element is
+# separated from its neighbours by a space.
+INLINE_TAGS = frozenset(("a", "b", "i", "code"))
+
+# Indexed text is capped per page so that a huge generated page cannot
+# blow up the search index.
+INDEX_TEXT_LIMIT = 100_000
+SUMMARY_LENGTH = 200
+
+
+def node_text(node, limit=INDEX_TEXT_LIMIT):
+    if isinstance(node, NodeArena):
+        return arena_text(node, limit)
+    parts = []
+    size = 0
+    stack = [node]
+    while stack and size < limit:
+        node = stack.pop()
+        if isinstance(node, str):
+            parts.append(node)
+        elif node.children is None:
+            if node.value:
+                parts.append(node.value)
+                size += len(node.value)
+        elif node.tag in INLINE_TAGS:
+            stack.extend(reversed(node.children))
+        else:
+            parts.append(" ")
+            stack.append(" ")
+            stack.extend(reversed(node.children))
+    return " ".join("".join(parts).split())[:limit]
+
+
+def arena_text(arena, limit=INDEX_TEXT_LIMIT):
+    # node_text over an arena's arrays; a block element's closing space is
+    # added once the walk passes the end of its subtree.
+    tag_names = arena.tag_names
+    tags = arena.tags
+    ends = arena.ends
+    parts = []
+    size = 0
+    closing = []
+    for index, value in enumerate(arena.values):
+        if size >= limit:
+            break
+        while closing and closing[-1] == index:
+            closing.pop()
+            parts.append(" ")
+        if ends[index] == index + 1:
+            if value:
+                parts.append(value)
+                size += len(value)
+        elif tag_names[tags[index]] not in INLINE_TAGS:
+            parts.append(" ")
+            closing.append(ends[index])
+    return " ".join("".join(parts).split())[:limit]
+
+
+def summarize(text, length=SUMMARY_LENGTH):
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    return text[: cut if cut > 0 else length].rstrip() + "…"
+
+
+def page_path(basepath, output):
+    if output == "index.html":
+        return basepath
+    if output.endswith("/index.html"):
+        return basepath + output[: -len("index.html")]
+    return basepath + output
+
+
+def absolute_url(site_url, path):
+    return site_url.rstrip("/") + path
+
+
+def render_sitemap(site_url, paths):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for path in paths:
+        lines.append(f"  <url><loc>{escape(absolute_url(site_url, path))}</loc></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def render_feed(site_url, basepath, title, items):
+    # items are (path, title, summary) tuples
+    home = absolute_url(site_url, basepath)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0">',
+        "  <channel>",
+        f"    <title>{escape(title)}</title>",
+        f"    <link>{escape(home)}</link>",
+        f"    <description>{escape(title)}</description>",
+    ]
+    for path, item_title, summary in items:
+        url = escape(absolute_url(site_url, path))
+        lines += [
+            "    <item>",
+            f"      <title>{escape(item_title)}</title>",
+            f"      <link>{url}</link>",
+            f"      <guid>{url}</guid>",
+            f"      <description>{escape(summary)}</description>",
+            "    </item>",
+        ]
+    lines += ["  </channel>", "</rss>"]
+    return "\n".join(lines) + "\n"
+
+
+def load_search_index(path):
+    # Previous entries keyed by page path, so pages skipped by an
+    # incremental build keep their text without being parsed again.
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            entries = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(entries, list):
+        return {}
+    return {
+        entry["path"]: entry
+        for entry in entries
+        if isinstance(entry, dict) and "path" in entry
+    }
+
+
+def render_search_index(entries):
+    return json.dumps(entries, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def write_artifacts(
+    dest_dir, manifest, basepath, site_url=None, search_entries=None
+):
+    # Returns the names of the artifacts whose contents changed.
+    pages = sorted(
+        (page_path(basepath, entry["output"]), key, entry)
+        for key, entry in manifest.pages.items()
+    )
+    written = []
+    if site_url is not None:
+        sitemap = render_sitemap(site_url, [path for path, _, _ in pages])
+        if write_text_atomic(dest_dir / SITEMAP_NAME, sitemap):
+            written.append(SITEMAP_NAME)
+
+        home = manifest.pages.get("index.md", {})
+        items = [
+            (path, entry.get("title") or key, entry.get("summary", ""))
+            for path, key, entry in pages
+            if key != "index.md"
+        ]
+        title = home.get("title") or "sitegen"
+        if write_text_atomic(
+            dest_dir / FEED_NAME, render_feed(site_url, basepath, title, items)
+        ):
+            written.append(FEED_NAME)
+
+    if search_entries is not None:
+        entries = [
+            search_entries[path] for path, _, _ in pages if path in search_entries
+        ]
+        if write_text_atomic(
+            dest_dir / SEARCH_INDEX_NAME, render_search_index(entries)
+        ):
+            written.append(SEARCH_INDEX_NAME)
+    return written
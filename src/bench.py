@@ -0,0 +1,606 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import convert
+from arena import markdown_to_arena
+from convert import (
+    BlockType,
+    block_to_block_type,
+    clear_inline_cache,
+    extract_title,
+    inline_cache_info,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    text_node_to_html_node,
+    text_to_textnodes,
+)
+from corpus import (
+    DEFAULT_MIX,
+    generate_corpus,
+    make_document,
+    make_paragraph,
+    parse_mix,
+)
+from leafnode import LeafNode
+from main import generate_page, generate_pages_recursive
+from manifest import BuildManifest
+from parse import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from staticsync import sync_static
+from stream import generate_page_streamed
+from template import Template
+from textnode import TextNode, TextType
+
+TEMPLATE_FOR_STAGES = (
+    '<html><head><title>{{ Title }}</title><link href="/index.css" /></head>'
+    "<body><article>{{ Content }}</article></body></html>"
+)
+
+
+def legacy_text_to_textnodes(text):
+    output = [TextNode(text, TextType.TEXT)]
+    output = split_nodes_delimiter(output, "**", TextType.BOLD)
+    output = split_nodes_delimiter(output, "_", TextType.ITALIC)
+    output = split_nodes_delimiter(output, "`", TextType.CODE)
+    output = split_nodes_image(output)
+    output = split_nodes_link(output)
+    return output
+
+
+def legacy_block_to_block_type(markdown):
+    if re.match(r"^```[\s\S]*```$", markdown):
+        return BlockType.CODE
+    if re.match(r"^#{1,6}", markdown):
+        return BlockType.HEADING
+    if re.match(r"^(>\s?.*\n?)+$", markdown):
+        return BlockType.QUOTE
+    if re.match(r"^(-\s.*\n?)+$", markdown):
+        return BlockType.UNORDERED_LIST
+    if re.match(r"^(\d+\.\s.*\n?)+$", markdown):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def tokenized_text_to_children(text):
+    # text_to_children without the markup-free fast path
+    return [text_node_to_html_node(node) for node in text_to_textnodes(text)]
+
+
+PROSE_WORDS = (
+    "the quick brown fox jumps over a lazy dog while rivers run to the sea "
+    "and old stories are told again by the fire late into the night"
+).split()
+
+
+def make_prose(blocks, rng, markup=0.0):
+    # Paragraphs of plain words; a `markup` fraction of them carry inline
+    # markup so they take the tokenizer path.
+    parts = ["# Prose document"]
+    for _ in range(blocks):
+        if rng.random() < markup:
+            parts.append(make_paragraph(8, rng))
+        else:
+            words = rng.choices(PROSE_WORDS, k=rng.randint(40, 120))
+            parts.append(" ".join(words) + ".")
+    return "\n\n".join(parts)
+
+
+# The legacy patterns backtrack exponentially when the last line of an
+# otherwise valid block breaks the pattern; keep their inputs small.
+LEGACY_BACKTRACK_LIMIT = 16
+
+PATHOLOGICAL_BLOCKS = {
+    "quote": lambda n: "\n".join("> quoted line of text" for _ in range(n)),
+    "quote-broken": lambda n: "> quoted  line\n" * n + "not a quote",
+    "ulist": lambda n: "\n".join("- list item" for _ in range(n)),
+    "ulist-broken": lambda n: "- list  item\n" * n + "-broken",
+    "olist": lambda n: "\n".join(f"{i}. list item" for i in range(1, n + 1)),
+    "olist-broken": lambda n: "1. list  item\n" * n + "2.broken",
+    "code": lambda n: "```\n" + "code line\n" * n + "```",
+}
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def time_call(func, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_inline(args):
+    rng = random.Random(args.seed)
+    results = []
+    for fragments in args.sizes:
+        paragraph = make_paragraph(fragments, rng)
+        for name, func in (
+            ("pipeline", legacy_text_to_textnodes),
+            ("scanner", text_to_textnodes),
+        ):
+            seconds = time_call(func, paragraph, args.repeat)
+            results.append(
+                {
+                    "bench": "inline",
+                    "impl": name,
+                    "chars": len(paragraph),
+                    "seconds": seconds,
+                    "mb_per_s": len(paragraph) / seconds / 1e6,
+                }
+            )
+    return results
+
+
+class UnslottedLeafNode:
+    # LeafNode's attributes without __slots__, for the slots benchmark
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+def bench_slots(args):
+    # Traced memory of --items leaf nodes with and without __slots__; the
+    # values are shared, so the difference is the per-node overhead.
+    values = [f"item {index}" for index in range(args.items)]
+    chars = sum(len(value) for value in values)
+    results = []
+    for name, node_class in (("dict", UnslottedLeafNode), ("slots", LeafNode)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        nodes = [node_class("li", value) for value in values]
+        seconds = time.perf_counter() - start
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del nodes
+        results.append(
+            {
+                "bench": "slots",
+                "impl": name,
+                "chars": chars,
+                "seconds": seconds,
+                "mb_per_s": chars / seconds / 1e6,
+                "traced_peak_mb": traced_peak / 1e6,
+            }
+        )
+    return results
+
+
+def bench_memory(args):
+    # Run this benchmark in a fresh process: peak RSS never goes down, so
+    # only the first measurement in a process is meaningful.
+    rng = random.Random(args.seed)
+    markdown = make_document(args.blocks, rng)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    html = markdown_to_html_node(markdown).to_html()
+    seconds = time.perf_counter() - start
+    rss_peak = peak_rss_mb()
+    del html
+
+    tracemalloc.start()
+    html = markdown_to_html_node(markdown).to_html()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return [
+        {
+            "bench": "memory",
+            "impl": "tree",
+            "chars": len(markdown),
+            "seconds": seconds,
+            "mb_per_s": len(markdown) / seconds / 1e6,
+            "html_chars": len(html),
+            "traced_peak_mb": traced_peak / 1e6,
+            "rss_baseline_mb": baseline,
+            "rss_peak_mb": rss_peak,
+        }
+    ]
+
+
+def bench_stream(args):
+    # Converts one --blocks sized file to disk with the whole-document tree
+    # and with the memory-mapped streaming path, tracing peak allocations.
+    rng = random.Random(args.seed)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        md_path = root / "big.md"
+        md_path.write_text(make_document(args.blocks, rng), encoding="utf-8")
+        template_path = root / "template.html"
+        template_path.write_text(TEMPLATE_FOR_STAGES, encoding="utf-8")
+        chars = md_path.stat().st_size
+
+        def tree(dest):
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(md_path, template_path, dest, "/")
+
+        def streamed(dest):
+            generate_page_streamed(md_path, template_path, dest, "/")
+
+        for name, func in (("tree", tree), ("stream", streamed)):
+            seconds = time_call(func, root / f"{name}.html", args.repeat)
+            tracemalloc.start()
+            func(root / f"{name}.html")
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append(
+                {
+                    "bench": "stream",
+                    "impl": name,
+                    "chars": chars,
+                    "seconds": seconds,
+                    "mb_per_s": chars / seconds / 1e6,
+                    "traced_peak_mb": traced_peak / 1e6,
+                }
+            )
+    return results
+
+
+def make_glossary(items, rng):
+    # One list with --items entries, like a glossary page
+    return "# Glossary\n\n" + "\n".join(
+        f"- **term {index}**: {make_paragraph(2, rng)}" for index in range(items)
+    )
+
+
+def bench_arena(args):
+    # Converts and renders one wide list with the object tree and with the
+    # flat node arena, tracing peak allocations.
+    markdown = make_glossary(args.items, random.Random(args.seed))
+    results = []
+    for name, convert_markdown in (
+        ("tree", markdown_to_html_node),
+        ("arena", markdown_to_arena),
+    ):
+
+        def render(markdown):
+            return convert_markdown(markdown).to_html()
+
+        seconds = time_call(render, markdown, args.repeat)
+        clear_inline_cache()
+        tracemalloc.start()
+        render(markdown)
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append(
+            {
+                "bench": "arena",
+                "impl": name,
+                "chars": len(markdown),
+                "seconds": seconds,
+                "mb_per_s": len(markdown) / seconds / 1e6,
+                "traced_peak_mb": traced_peak / 1e6,
+            }
+        )
+    return results
+
+
+def bench_blocktype(args):
+    results = []
+    for case, make_block in PATHOLOGICAL_BLOCKS.items():
+        for lines in args.lines:
+            block = make_block(lines)
+            impls = [("dispatch", block_to_block_type)]
+            if not case.endswith("-broken") or lines <= LEGACY_BACKTRACK_LIMIT:
+                impls.insert(0, ("regex", legacy_block_to_block_type))
+            for name, func in impls:
+                seconds = time_call(func, block, args.repeat)
+                results.append(
+                    {
+                        "bench": "blocktype",
+                        "impl": f"{name}:{case}",
+                        "chars": len(block),
+                        "seconds": seconds,
+                        "mb_per_s": len(block) / seconds / 1e6,
+                    }
+                )
+    return results
+
+
+def bench_prose(args):
+    rng = random.Random(args.seed)
+    fast_path = convert.text_to_children
+    results = []
+    for markup in args.markup:
+        markdown = make_prose(args.page_blocks * 25, rng, markup)
+        for name, func in (
+            ("tokenizer", tokenized_text_to_children),
+            ("fastpath", fast_path),
+        ):
+            convert.text_to_children = func
+            try:
+                seconds = time_call(markdown_to_html_node, markdown, args.repeat)
+            finally:
+                convert.text_to_children = fast_path
+            results.append(
+                {
+                    "bench": "prose",
+                    "impl": f"{name}:{markup:g}",
+                    "chars": len(markdown),
+                    "seconds": seconds,
+                    "mb_per_s": len(markdown) / seconds / 1e6,
+                }
+            )
+    return results
+
+
+def bench_memo(args):
+    # Converts every corpus page once with the inline cache off and on.
+    rng = random.Random(args.seed)
+    documents = [
+        make_document(args.page_blocks, rng, args.mix) for _ in range(args.pages)
+    ]
+    chars = sum(len(document) for document in documents)
+    max_chars = convert.INLINE_CACHE_MAX_CHARS
+    results = []
+    for name, limit in (("nocache", -1), ("memo", max_chars)):
+        convert.INLINE_CACHE_MAX_CHARS = limit
+        best = float("inf")
+        try:
+            for _ in range(args.repeat):
+                clear_inline_cache()
+                start = time.perf_counter()
+                for document in documents:
+                    markdown_to_html_node(document)
+                best = min(best, time.perf_counter() - start)
+        finally:
+            convert.INLINE_CACHE_MAX_CHARS = max_chars
+        info = inline_cache_info()
+        results.append(
+            {
+                "bench": "memo",
+                "impl": name,
+                "chars": chars,
+                "seconds": best,
+                "mb_per_s": chars / best / 1e6,
+                "hits": info.hits,
+                "misses": info.misses,
+            }
+        )
+    return results
+
+
+def make_corpus(args, root):
+    return generate_corpus(
+        root,
+        args.pages,
+        args.page_blocks,
+        depth=args.depth,
+        mix=args.mix,
+        seed=args.seed,
+    )
+
+
+def run_build(root, manifest, jobs=1, io_threads=0):
+    with contextlib.redirect_stdout(io.StringIO()):
+        manifest.static, _ = sync_static(
+            root / "static", root / "docs", manifest.static
+        )
+        return generate_pages_recursive(
+            root / "content",
+            root / "docs",
+            root / "template.html",
+            "/",
+            manifest,
+            jobs=jobs,
+            io_threads=io_threads,
+        )
+
+
+def bench_build(args):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        info = make_corpus(args, root)
+        manifest = BuildManifest()
+        for phase in ("cold", "warm"):
+            start = time.perf_counter()
+            stats = run_build(root, manifest, args.jobs, args.io_threads)
+            seconds = time.perf_counter() - start
+            results.append(
+                {
+                    "bench": "build",
+                    "impl": f"{phase}:jobs={args.jobs}:io={args.io_threads}",
+                    "chars": info["chars"],
+                    "pages": info["pages"],
+                    "rendered": stats["rendered"],
+                    "seconds": seconds,
+                    "mb_per_s": info["chars"] / seconds / 1e6,
+                }
+            )
+    return results
+
+
+def bench_stages(args):
+    totals = dict.fromkeys(
+        ("read", "blocks", "inline", "convert", "to_html", "template", "write"), 0.0
+    )
+    template = Template(TEMPLATE_FOR_STAGES)
+    clock = time.perf_counter
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        info = make_corpus(args, root)
+        out_dir = root / "out"
+        out_dir.mkdir()
+        for index, md_path in enumerate(sorted((root / "content").rglob("*.md"))):
+            t0 = clock()
+            markdown = md_path.read_text(encoding="utf-8")
+            t1 = clock()
+            blocks = markdown_to_blocks(markdown)
+            t2 = clock()
+            for block in blocks:
+                if block[:1] not in "#`>-0123456789":
+                    text_to_textnodes(block.replace("\n", " "))
+            t3 = clock()
+            node = markdown_to_html_node(markdown)
+            t4 = clock()
+            html = node.to_html()
+            t5 = clock()
+            page = template.render(Title=extract_title(markdown), Content=html)
+            t6 = clock()
+            (out_dir / f"{index}.html").write_text(page, encoding="utf-8")
+            t7 = clock()
+            totals["read"] += t1 - t0
+            totals["blocks"] += t2 - t1
+            totals["inline"] += t3 - t2
+            totals["convert"] += t4 - t3
+            totals["to_html"] += t5 - t4
+            totals["template"] += t6 - t5
+            totals["write"] += t7 - t6
+
+    return [
+        {
+            "bench": "stages",
+            "impl": stage,
+            "chars": info["chars"],
+            "pages": info["pages"],
+            "seconds": seconds,
+            "mb_per_s": info["chars"] / seconds / 1e6 if seconds else 0.0,
+        }
+        for stage, seconds in totals.items()
+    ]
+
+
+BENCHMARKS = {
+    "arena": bench_arena,
+    "blocktype": bench_blocktype,
+    "build": bench_build,
+    "inline": bench_inline,
+    "memo": bench_memo,
+    "memory": bench_memory,
+    "prose": bench_prose,
+    "slots": bench_slots,
+    "stages": bench_stages,
+    "stream": bench_stream,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(args):
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "benchmarks": args.bench,
+        "seed": args.seed,
+    }
+
+
+def print_results(results):
+    for result in results:
+        print(
+            f"{result['bench']:<10} {result['impl']:<22} {result['chars']:>10} chars "
+            f"{result['seconds'] * 1000:>10.3f} ms {result['mb_per_s']:>8.2f} MB/s"
+        )
+        if "rss_peak_mb" in result:
+            print(
+                f"{'':<33} traced peak {result['traced_peak_mb']:.1f} MB, "
+                f"RSS {result['rss_baseline_mb']:.1f} -> {result['rss_peak_mb']:.1f} MB"
+            )
+        elif "hits" in result:
+            print(f"{'':<33} {result['hits']} hits, {result['misses']} misses")
+        elif "traced_peak_mb" in result:
+            print(f"{'':<33} traced peak {result['traced_peak_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="sitegen-bench")
+    parser.add_argument("bench", nargs="+", choices=sorted(BENCHMARKS))
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 10000],
+        help="paragraph sizes, in inline fragments",
+    )
+    parser.add_argument(
+        "--blocks",
+        type=int,
+        default=20000,
+        help="document size for the memory and stream benchmarks, in blocks",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=50000,
+        help="list size for the arena and slots benchmarks, in items",
+    )
+    parser.add_argument(
+        "--lines",
+        type=int,
+        nargs="+",
+        default=[16, 1000, 10000],
+        help="block sizes for the blocktype benchmark, in lines",
+    )
+    parser.add_argument(
+        "--markup",
+        type=float,
+        nargs="+",
+        default=[0.0, 0.1, 0.5],
+        help="fractions of prose paragraphs that contain inline markup",
+    )
+    parser.add_argument("--pages", type=int, default=200, help="corpus size")
+    parser.add_argument(
+        "--page-blocks", type=int, default=40, help="corpus page size, in blocks"
+    )
+    parser.add_argument("--depth", type=int, default=2, help="corpus nesting")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--io-threads", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json",
+        type=Path,
+        metavar="PATH",
+        help="also write results as JSON ('-' for stdout only)",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for name in args.bench:
+        results.extend(BENCHMARKS[name](args))
+
+    report = {"meta": run_metadata(args), "results": results}
+    if args.json is None or str(args.json) != "-":
+        print_results(results)
+    if args.json is not None:
+        if str(args.json) == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            args.json.write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
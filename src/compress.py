@@ -0,0 +1,172 @@
+import gzip
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from staticsync import remove_empty_parents, walk_files
+from writer import write_bytes_atomic
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# HTML/CSS and the generated site artifacts are always compressed; other
+# text-like static assets only with --compress-static. Images and fonts
+# are already compressed and are left alone.
+OUTPUT_SUFFIXES = (".html", ".css", ".xml", ".json")
+STATIC_SUFFIXES = OUTPUT_SUFFIXES + (".js", ".mjs", ".svg", ".txt", ".map", ".ico")
+SIBLING_SUFFIXES = (".gz", ".br")
+MAX_LEVEL = 11
+
+
+def gzip_bytes(data, level):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+
+
+def brotli_bytes(data, level):
+    return brotli.compress(data, quality=level)
+
+
+# format name -> (sibling suffix, compress function, default level)
+FORMATS = {"gzip": (".gz", gzip_bytes, 9)}
+if brotli is not None:
+    FORMATS["br"] = (".br", brotli_bytes, 11)
+
+
+def parse_formats(text):
+    formats = []
+    for name in text.split(","):
+        name = name.strip()
+        if name == "br" and brotli is None:
+            raise ValueError("brotli compression needs the 'brotli' package")
+        if name not in FORMATS:
+            raise ValueError(f"unknown compression format: {name}")
+        if name not in formats:
+            formats.append(name)
+    return formats
+
+
+def compression_settings(formats, level=None):
+    # e.g. "gzip-9,br-11": every format with the level it is written at
+    return ",".join(
+        f"{name}-{FORMATS[name][2] if level is None else level}" for name in formats
+    )
+
+
+def remove_siblings(path, suffixes=SIBLING_SUFFIXES):
+    # Unlinks path's precompressed siblings, so that a rewritten output is
+    # not served with outdated ones. Returns how many there were.
+    removed = 0
+    for suffix in suffixes:
+        try:
+            os.unlink(f"{path}{suffix}")
+        except FileNotFoundError:
+            continue
+        removed += 1
+    return removed
+
+
+def compress_file(path, formats, level=None, stamp=None):
+    # Writes path.gz / path.br next to path. Returns the number of siblings
+    # written and the stamp (settings and source hash) they were made
+    # from; nothing is written if stamp, from an earlier call, still
+    # matches and the siblings exist. Siblings of other formats, from
+    # earlier settings, are removed.
+    path = Path(path)
+    data = path.read_bytes()
+    new_stamp = (
+        f"{compression_settings(formats, level)}:{hashlib.sha256(data).hexdigest()}"
+    )
+    siblings = [path.with_name(path.name + FORMATS[name][0]) for name in formats]
+    if stamp == new_stamp and all(sibling.exists() for sibling in siblings):
+        return 0, new_stamp
+    for name, sibling in zip(formats, siblings):
+        _, compress, default_level = FORMATS[name]
+        write_bytes_atomic(
+            sibling, compress(data, default_level if level is None else level)
+        )
+    suffixes = {FORMATS[name][0] for name in formats}
+    remove_siblings(
+        path, [suffix for suffix in SIBLING_SUFFIXES if suffix not in suffixes]
+    )
+    return len(siblings), new_stamp
+
+
+class Precompressor:
+    # Compresses files under root on a thread pool (zlib and brotli release
+    # the GIL) while the rest of the build carries on. stamps maps paths
+    # relative to root to their compress_file stamps, and is updated by
+    # wait(); the build keeps it in the manifest.
+    def __init__(self, root, formats, level=None, threads=None, stamps=None):
+        self.root = Path(root)
+        self.formats = formats
+        self.level = level
+        self.stamps = stamps if stamps is not None else {}
+        self.executor = ThreadPoolExecutor(
+            threads or os.cpu_count() or 1, thread_name_prefix="sitegen-compress"
+        )
+        self.futures = {}
+
+    def settings_changed(self):
+        # True if earlier stamps were made with other formats or levels (or
+        # there are none), so files the build did not touch need a pass too.
+        prefix = compression_settings(self.formats, self.level) + ":"
+        return not self.stamps or any(
+            not stamp.startswith(prefix) for stamp in self.stamps.values()
+        )
+
+    def submit(self, paths):
+        # A path already submitted is skipped.
+        for path in paths:
+            rel_path = Path(path).relative_to(self.root).as_posix()
+            if rel_path in self.futures:
+                continue
+            self.futures[rel_path] = self.executor.submit(
+                compress_file,
+                path,
+                self.formats,
+                self.level,
+                self.stamps.get(rel_path),
+            )
+
+    def submit_tree(self, suffixes, exclude=()):
+        exclude = set(exclude)
+        self.submit(
+            self.root / rel_path
+            for rel_path in walk_files(self.root)
+            if rel_path.endswith(suffixes) and rel_path not in exclude
+        )
+
+    def remove_orphans(self, keep=()):
+        # Drops siblings and stamps whose source is gone, e.g. for pruned
+        # pages.
+        keep = set(keep)
+        removed = 0
+        for rel_path in list(walk_files(self.root)):
+            if not rel_path.endswith(SIBLING_SUFFIXES) or rel_path in keep:
+                continue
+            sibling = self.root / rel_path
+            source = sibling.with_suffix("")
+            if source.suffix in STATIC_SUFFIXES and not source.exists():
+                sibling.unlink()
+                remove_empty_parents(sibling, self.root)
+                removed += 1
+        for rel_path in list(self.stamps):
+            if not (self.root / rel_path).exists():
+                del self.stamps[rel_path]
+        return removed
+
+    def wait(self):
+        # Returns the number of compressed files written.
+        written = 0
+        try:
+            for rel_path, future in self.futures.items():
+                count, self.stamps[rel_path] = future.result()
+                written += count
+            return written
+        finally:
+            self.futures = {}
+            self.executor.shutdown()
@@ -1,9 +1,16 @@
+import functools
 from enum import Enum
 import re
 from htmlnode import HTMLNode
 from leafnode import LeafNode
 from parentnode import ParentNode
-from parse import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from parse import (
+    INLINE_SYNTAX,
+    InlineType,
+    delimited,
+    register_inline,
+    tokenize_inline,
+)
 from textnode import TextNode, TextType
 
 
@@ -30,50 +37,112 @@ def text_node_to_html_node(text_node):
             return LeafNode("a", text_node.text, {"href": text_node.url})
         case TextType.IMAGE:
             return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        case InlineType():
+            return text_node.text_type.render(text_node)
         case _:
             raise ValueError("TextType not valid")
 
 
+STRIKETHROUGH = InlineType("strikethrough", lambda node: LeafNode("s", node.text))
+register_inline("~", delimited("~~", STRIKETHROUGH, required=False))
+
+
 def text_to_textnodes(text):
-    output = [TextNode(text, TextType.TEXT)]
-    output = split_nodes_delimiter(output, "**", TextType.BOLD)
-    output = split_nodes_delimiter(output, "_", TextType.ITALIC)
-    output = split_nodes_delimiter(output, "`", TextType.CODE)
-    output = split_nodes_image(output)
-    output = split_nodes_link(output)
-    return output
+    return tokenize_inline(text)
 
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    blocks = list(map(lambda b: b.strip(), blocks))
+    blocks = [block for _, block in iter_blocks(markdown)]
+    return blocks or [""]
 
-    return blocks
 
+def iter_blocks(markdown):
+    # Yields (offset, block) pairs in a single pass over the lines. Blank
+    # lines separate blocks, except inside ``` fences. Also accepts bytes
+    # or an mmap, in which case the blocks are bytes.
+    if isinstance(markdown, str):
+        newline, fence = "\n", "```"
+    else:
+        newline, fence = b"\n", b"```"
+    length = len(markdown)
+    block_start = None
+    block_end = 0
+    in_fence = False
+    pos = 0
 
-def block_to_block_type(markdown):
+    while pos < length:
+        line_end = markdown.find(newline, pos)
+        if line_end == -1:
+            line_end = length
+        line = markdown[pos:line_end]
+        stripped = line.strip()
 
-    for i in range(6):
-        if re.match(r"^```[\s\S]*```$", markdown):
-            return BlockType.CODE
-        if re.match(r"^#{1,6}", markdown):
-            return BlockType.HEADING
-        if re.match(r"^(>\s?.*\n?)+$", markdown):
-            return BlockType.QUOTE
-        if re.match(r"^(-\s.*\n?)+$", markdown):
-            return BlockType.UNORDERED_LIST
-        if re.match(r"^(\d+\.\s.*\n?)+$", markdown):
-            return BlockType.ORDERED_LIST
+        if not stripped and not in_fence:
+            if block_start is not None:
+                yield _block_at(markdown, block_start, block_end)
+                block_start = None
         else:
-            return BlockType.PARAGRAPH
+            if block_start is None:
+                block_start = pos
+            block_end = line_end
+            if stripped.startswith(fence):
+                if in_fence:
+                    in_fence = False
+                else:
+                    in_fence = len(stripped) < 6 or not stripped.endswith(fence)
+        pos = line_end + 1
+
+    if block_start is not None:
+        yield _block_at(markdown, block_start, block_end)
+
+
+def _block_at(markdown, start, end):
+    block = markdown[start:end]
+    stripped = block.lstrip()
+    return start + len(block) - len(stripped), stripped.rstrip()
+
+
+# Each line pattern must end at a newline or the end of the block, which
+# leaves only one way to match every line and so rules out the exponential
+# backtracking of the old "(>\s?.*\n?)+$" style patterns.
+CODE_BLOCK_RE = re.compile(r"```.*```", re.DOTALL)
+HEADING_BLOCK_RE = re.compile(r"#.*", re.DOTALL)
+QUOTE_BLOCK_RE = re.compile(r"(?:>[^\n]*(?:\n|\Z))+")
+ULIST_BLOCK_RE = re.compile(r"(?:-[ \t][^\n]*(?:\n|\Z))+")
+OLIST_BLOCK_RE = re.compile(r"(?:\d+\.[ \t][^\n]*(?:\n|\Z))+")
+
+BLOCK_RULES = {
+    "`": (CODE_BLOCK_RE, BlockType.CODE),
+    "#": (HEADING_BLOCK_RE, BlockType.HEADING),
+    ">": (QUOTE_BLOCK_RE, BlockType.QUOTE),
+    "-": (ULIST_BLOCK_RE, BlockType.UNORDERED_LIST),
+}
+for digit in "0123456789":
+    BLOCK_RULES[digit] = (OLIST_BLOCK_RE, BlockType.ORDERED_LIST)
+
+
+def extract_title(markdown):
+    for line in markdown.splitlines():
+        line = line.strip()
+        if line.startswith("# "):
+            return line[2:].strip()
+    raise Exception("No h1 title found")
+
+
+def block_to_block_type(markdown):
+    rule = BLOCK_RULES.get(markdown[:1])
+    if rule is not None and rule[0].fullmatch(markdown):
+        return rule[1]
+    return BlockType.PARAGRAPH
 
 
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
     children = []
-    for block in blocks:
+    for _, block in iter_blocks(markdown):
         html_node = block_to_html_node(block)
         children.append(html_node)
+    if not children:
+        children.append(block_to_html_node(""))
     return ParentNode("div", children, None)
 
 
@@ -94,7 +163,24 @@ def block_to_html_node(block):
     raise ValueError("invalid block type")
 
 
+# Inline text up to INLINE_CACHE_MAX_CHARS long is memoised, since list
+# items, link texts and boilerplate repeat across pages. The cached leaf
+# nodes are shared between trees and must not be modified.
+INLINE_CACHE_SIZE = 8192
+INLINE_CACHE_MAX_CHARS = 1024
+
+
 def text_to_children(text):
+    # Text without any markup characters is a single text leaf; skip the
+    # tokenizer and the intermediate TextNode.
+    if INLINE_SYNTAX.search(text) is None:
+        return [LeafNode(None, text)]
+    if len(text) <= INLINE_CACHE_MAX_CHARS:
+        return list(_cached_children(text, INLINE_SYNTAX.version))
+    return _convert_inline(text)
+
+
+def _convert_inline(text):
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
@@ -103,6 +189,19 @@ def text_to_children(text):
     return children
 
 
+@functools.lru_cache(maxsize=INLINE_CACHE_SIZE)
+def _cached_children(text, syntax_version):
+    return tuple(_convert_inline(text))
+
+
+def inline_cache_info():
+    return _cached_children.cache_info()
+
+
+def clear_inline_cache():
+    _cached_children.cache_clear()
+
+
 def paragraph_to_html_node(block):
     lines = block.split("\n")
     paragraph = " ".join(lines)
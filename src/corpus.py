@@ -0,0 +1,143 @@
+import argparse
+import random
+from pathlib import Path
+
+INLINE_FRAGMENTS = [
+    "plain words flow on and on",
+    "some **bold text** here",
+    "an _italic phrase_ there",
+    "a `code span` inline",
+    "a [link to docs](https://example.com/docs)",
+    # one of the images generate_corpus writes
+    "an ![inline image](/images/image-0.png)",
+]
+
+DEFAULT_MIX = {
+    "paragraph": 4,
+    "heading": 1,
+    "ulist": 2,
+    "olist": 1,
+    "quote": 1,
+    "code": 1,
+}
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"unknown block kind: {name}")
+        mix[name] = int(weight) if weight else 1
+    return mix
+
+
+def make_paragraph(fragments, rng):
+    return " ".join(rng.choice(INLINE_FRAGMENTS) for _ in range(fragments))
+
+
+def make_block(kind, rng, index):
+    if kind == "paragraph":
+        return make_paragraph(rng.randint(4, 12), rng)
+    if kind == "heading":
+        return f"{'#' * rng.randint(2, 4)} Section {index}"
+    if kind == "ulist":
+        items = rng.randint(3, 8)
+        return "\n".join(f"- {make_paragraph(2, rng)}" for _ in range(items))
+    if kind == "olist":
+        items = rng.randint(3, 8)
+        return "\n".join(f"{n}. {make_paragraph(2, rng)}" for n in range(1, items + 1))
+    if kind == "quote":
+        lines = rng.randint(1, 4)
+        return "\n".join(f"> {make_paragraph(2, rng)}" for _ in range(lines))
+    if kind == "code":
+        lines = rng.randint(2, 10)
+        body = "\n".join(f"    value_{n} = compute({n})" for n in range(lines))
+        return f"```\n{body}\n```"
+    raise ValueError(f"unknown block kind: {kind}")
+
+
+def make_document(blocks, rng, mix=None, title="Benchmark document"):
+    mix = mix or DEFAULT_MIX
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    parts = [f"# {title}"]
+    for index in range(blocks):
+        kind = rng.choices(kinds, weights)[0]
+        parts.append(make_block(kind, rng, index))
+    return "\n\n".join(parts)
+
+
+def page_path(index, depth, fanout):
+    parts = []
+    remaining = index
+    for _ in range(depth):
+        parts.append(f"section-{remaining % fanout}")
+        remaining //= fanout
+    parts.append(f"page-{index}")
+    return Path(*parts) / "index.md"
+
+
+def generate_corpus(
+    root, pages, blocks, depth=2, fanout=10, mix=None, seed=0, static_files=5
+):
+    root = Path(root)
+    rng = random.Random(seed)
+    content_dir = root / "content"
+    static_dir = root / "static"
+    total_chars = 0
+
+    for index in range(pages):
+        md_path = content_dir / page_path(index, depth, fanout)
+        md_path.parent.mkdir(parents=True, exist_ok=True)
+        markdown = make_document(blocks, rng, mix, title=f"Page {index}")
+        md_path.write_text(markdown, encoding="utf-8")
+        total_chars += len(markdown)
+
+    (static_dir / "images").mkdir(parents=True, exist_ok=True)
+    (static_dir / "index.css").write_text("body { margin: 0 auto; }\n")
+    # at least image-0.png, which INLINE_FRAGMENTS links to
+    for index in range(max(static_files, 1)):
+        (static_dir / "images" / f"image-{index}.png").write_bytes(
+            rng.randbytes(4096)
+        )
+    (root / "template.html").write_text(TEMPLATE, encoding="utf-8")
+    return {"pages": pages, "chars": total_chars}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="sitegen-corpus")
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting")
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="block weights, e.g. paragraph=4,ulist=2,code=1",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    info = generate_corpus(
+        args.root, args.pages, args.blocks, args.depth, args.fanout, args.mix, args.seed
+    )
+    print(f"Wrote {info['pages']} pages ({info['chars']} chars) to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
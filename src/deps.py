@@ -0,0 +1,124 @@
+import re
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from convert import BlockType, block_to_block_type, iter_blocks
+from manifest import hash_file
+from parse import extract_markdown_images, extract_markdown_links
+
+CODE_SPAN_RE = re.compile(r"`[^`]*`")
+
+
+def page_references(markdown):
+    # markdown is the page source, or an iterable of its blocks. Returns
+    # the root-relative paths its images and links point at. Code blocks
+    # and code spans are skipped, since they render as plain text.
+    if isinstance(markdown, str):
+        markdown = (block for _, block in iter_blocks(markdown))
+    refs = set()
+    for block in markdown:
+        add_block_references(block, refs)
+    return sorted(refs)
+
+
+def add_block_references(block, refs):
+    if block_to_block_type(block) == BlockType.CODE:
+        return
+    text = CODE_SPAN_RE.sub("", block)
+    for _, url in extract_markdown_images(text) + extract_markdown_links(text):
+        path = local_path(url)
+        if path is not None:
+            refs.add(path)
+
+
+def resolve_dependencies(refs, content_dir, static_dir=None, stamps=None):
+    # Paths are resolved against static/ first, then against the content
+    # tree. Assets are render inputs and carry a stamp; links to other
+    # pages are recorded as edges only, since a page's output does not
+    # change when the page it links to does. stamps is as for
+    # changed_assets.
+    if stamps is None:
+        stamps = {}
+    assets = {}
+    links = set()
+    for path in refs:
+        if static_dir is not None and path:
+            stamp = cached_stamp(path, static_dir, stamps)
+            if stamp is not None:
+                assets[path] = stamp
+                continue
+        page = linked_page(content_dir, path)
+        if page is not None:
+            links.add(page)
+    return assets, sorted(links)
+
+
+def page_dependencies(markdown, content_dir, static_dir=None, stamps=None):
+    return resolve_dependencies(
+        page_references(markdown), content_dir, static_dir, stamps
+    )
+
+
+def local_path(url):
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path.startswith("/"):
+        return None
+    return unquote(parts.path).strip("/")
+
+
+def linked_page(content_dir, path):
+    content_dir = Path(content_dir)
+    if path.endswith(".html"):
+        candidates = [path[: -len(".html")] + ".md"]
+    elif path:
+        candidates = [f"{path}/index.md", f"{path}.md"]
+    else:
+        candidates = ["index.md"]
+    for candidate in candidates:
+        if (content_dir / candidate).is_file():
+            return candidate
+    return None
+
+
+def asset_stamp(path, previous=None):
+    # [size, mtime_ns, sha256]. Assets are compared by their hash, so
+    # touching one without changing it does not rebuild the pages that use
+    # it; the hash is taken over from previous while the size and mtime
+    # still match, so unchanged assets are not read on every build.
+    try:
+        stat = Path(path).stat()
+        if (
+            isinstance(previous, list)
+            and len(previous) == 3
+            and previous[:2] == [stat.st_size, stat.st_mtime_ns]
+        ):
+            return previous
+        return [stat.st_size, stat.st_mtime_ns, hash_file(path)]
+    except OSError:
+        return None
+
+
+def cached_stamp(path, static_dir, stamps, previous=None):
+    if path not in stamps:
+        stamps[path] = asset_stamp(Path(static_dir) / path, previous)
+    return stamps[path]
+
+
+def changed_assets(assets, static_dir, stamps=None):
+    # stamps memoises asset_stamp across pages within one build. Stamps of
+    # assets that were touched but not changed are refreshed in place, so
+    # they are not hashed again next time.
+    if stamps is None:
+        stamps = {}
+    changed = []
+    for path, stamp in sorted(assets.items()):
+        current = cached_stamp(path, static_dir, stamps, stamp)
+        if (
+            current is None
+            or not isinstance(stamp, list)
+            or current[2:] != stamp[2:]
+        ):
+            changed.append(path)
+        elif current != stamp:
+            assets[path] = current
+    return changed
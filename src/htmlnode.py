@@ -1,6 +1,12 @@
+import sys
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        # Tags repeat across millions of nodes; share one string per tag name.
+        self.tag = sys.intern(tag) if type(tag) is str else tag
         self.value = value
         self.children = children
         self.props = props
@@ -8,6 +14,14 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError()
 
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_html(self, sink):
+        write = sink.write
+        for chunk in self.iter_html():
+            write(chunk)
+
     def props_to_html(self):
         html = ""
         for key in self.props:
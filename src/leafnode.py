@@ -2,18 +2,25 @@ from htmlnode import HTMLNode
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
     def to_html(self):
-        if self.value is None and self.tag != "img":
-            raise ValueError("All leaf nodes must have a value")
-        if self.tag is None:
-            return self.value
+        return leaf_html(self.tag, self.value, self.props)
+
+
+def leaf_html(tag, value, props=None):
+    # Shared with the node arena, which stores leaves without LeafNode objects.
+    if value is None and tag != "img":
+        raise ValueError("All leaf nodes must have a value")
+    if tag is None:
+        return value
 
-        props_html = ""
-        if self.props:
-            props_html = " " + " ".join(f'{k}="{v}"' for k, v in self.props.items())
-        if self.tag == "img":
-            return f"<img{props_html}/>"
-        return f"<{self.tag}{props_html}>{self.value}</{self.tag}>"
+    props_html = ""
+    if props:
+        props_html = " " + " ".join(f'{k}="{v}"' for k, v in props.items())
+    if tag == "img":
+        return f"<img{props_html}/>"
+    return f"<{tag}{props_html}>{value}</{tag}>"
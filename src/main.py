@@ -1,81 +1,759 @@
-import shutil
+import argparse
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from convert import markdown_to_html_node
+import convert
+from arena import markdown_to_page_node
+from artifacts import (
+    SEARCH_INDEX_NAME,
+    load_search_index,
+    node_text,
+    page_path,
+    summarize,
+    write_artifacts,
+)
+from compress import (
+    MAX_LEVEL,
+    OUTPUT_SUFFIXES,
+    STATIC_SUFFIXES,
+    Precompressor,
+    parse_formats,
+    remove_siblings,
+)
+from convert import extract_title, inline_cache_info
+from deps import changed_assets, page_references, resolve_dependencies
+from manifest import BuildManifest, hash_file
+from pipeline import render_pages_pipelined
+from plan import Progress, create_directories, plan_pages
+from profiler import NULL_PROFILER, BuildProfiler
+from rendercache import RenderCache, render_key
+from staticsync import LINK_MODES, remove_empty_parents, sync_static
+from stream import (
+    extract_mapped_title,
+    generate_page_streamed,
+    iter_source_blocks,
+    map_source,
+    should_stream,
+)
+from template import load_template
+from writer import copy_atomic, write_atomic, write_text_atomic
+
+STATIC_DIR = Path("static")
+DEST_DIR = Path("docs")
+CONTENT_DIR = Path("content")
+TEMPLATE_PATH = Path("template.html")
+MANIFEST_PATH = Path(".sitegen") / "manifest.json"
+TRACE_PATH = Path(".sitegen") / "trace.json"
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="sitegen")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="ignore the build manifest and re-render every page",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--io-threads",
+        type=int,
+        default=0,
+        metavar="N",
+        help="with --jobs 1, read and write pages on N background threads",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash, not just size and mtime",
+    )
+    parser.add_argument(
+        "--link",
+        choices=LINK_MODES,
+        default="copy",
+        help="how changed static files are placed in the output directory",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="record per-stage and per-page timings and print the slowest",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help=f"trace-event JSON written by --profile (default: {TRACE_PATH})",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="reuse rendered pages from a shared content-addressed cache",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        metavar="MB",
+        help="evict least recently used cache entries above this size",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="list why each page was rebuilt",
+    )
+    parser.add_argument(
+        "--site-url",
+        default=None,
+        metavar="URL",
+        help="public site URL; also write sitemap.xml and feed.xml",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help=f"also write a client-side search index ({SEARCH_INDEX_NAME})",
+    )
+    parser.add_argument(
+        "--compress",
+        default=None,
+        metavar="FORMATS",
+        help="write precompressed siblings of changed HTML/CSS output: "
+        "gzip, br (needs the 'brotli' package) or gzip,br",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"compression level, 1-{MAX_LEVEL} (default: each format's maximum; "
+        "gzip stops at 9)",
+    )
+    parser.add_argument(
+        "--compress-static",
+        action="store_true",
+        help="with --compress, also compress text-like static assets (js, svg, ...)",
+    )
+    args = parser.parse_args(argv)
+    if args.trace is not None:
+        args.profile = True
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive integer")
+    if args.io_threads < 0:
+        parser.error("--io-threads must be zero or a positive integer")
+    if args.compress is not None:
+        try:
+            args.compress = parse_formats(args.compress)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.compress_level is not None and not 1 <= args.compress_level <= MAX_LEVEL:
+        parser.error(f"--compress-level must be between 1 and {MAX_LEVEL}")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+
+class BuildError(Exception):
+    def __init__(self, failures, stats=None):
+        self.failures = failures
+        self.stats = stats
+        lines = [f"{len(failures)} page(s) failed to build:"]
+        for path, error in failures:
+            lines.append(f"  {path}: {type(error).__name__}: {error}")
+        super().__init__("\n".join(lines))
 
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    src = Path("static")
-    dest = Path("docs")
-    content_dir = Path("content")
-    template_path = Path("template.html")
-
-    if dest.exists() and dest.is_dir():
-        shutil.rmtree(dest)
-
-    copy_static_to_public(src, dest)
-
-    generate_pages_recursive(content_dir, dest, template_path, basepath)
-
-
-def copy_static_to_public(src_dir, dest_dir):
-    if dest_dir.exists() and dest_dir.is_dir():
-        shutil.rmtree(dest_dir)
-    dest_dir.mkdir(parents=True, exist_ok=True)
-
-    for item in src_dir.iterdir():
-        src_item = item
-        dest_item = dest_dir / item.name
-        if item.is_dir():
-            copy_static_to_public(src_item, dest_item)
-        else:
-            shutil.copy2(src_item, dest_item)
-
-
-def extract_title(markdown):
-    for line in markdown.splitlines():
-        line = line.strip()
-        if line.startswith("# "):
-            return line[2:].strip()
-    raise Exception("No h1 title found")
-
-
-def generate_pages_recursive(content_dir, dest_dir, template_path, basepath):
-    for md_path in content_dir.rglob("*.md"):
-        rel_path = md_path.relative_to(content_dir)
-        html_path = dest_dir / rel_path.with_suffix(".html")
-        generate_page(
-            from_path=md_path,
-            template_path=template_path,
-            dest_path=html_path,
-            basepath=basepath,
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from serve import serve_main
+
+        serve_main(sys.argv[2:])
+        return
+
+    args = parse_args(sys.argv[1:])
+    manifest = BuildManifest() if args.force else BuildManifest.load(MANIFEST_PATH)
+    profiler = BuildProfiler() if args.profile else None
+    try:
+        build(args, manifest, profiler)
+    except BuildError as error:
+        print(error, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        manifest.save(MANIFEST_PATH)
+        if profiler is not None:
+            trace_path = args.trace or TRACE_PATH
+            profiler.write_trace(trace_path)
+            print(profiler.summary())
+            print(f"Trace written to {trace_path}")
+
+
+def build(args, manifest, profiler=None):
+    prof = profiler or NULL_PROFILER
+    cache = None
+    if args.cache is not None:
+        cache = RenderCache(args.cache, args.cache_size * 1024 * 1024)
+    with prof.stage("static"):
+        manifest.static, _ = sync_static(
+            STATIC_DIR,
+            DEST_DIR,
+            manifest.static,
+            checksum=args.checksum,
+            link=args.link,
+        )
+    compressor = None
+    if args.compress:
+        # Static files are compressed while the pages render, and pages as
+        # soon as they are written.
+        compressor = Precompressor(
+            DEST_DIR, args.compress, args.compress_level, stamps=manifest.compressed
+        )
+        suffixes = STATIC_SUFFIXES if args.compress_static else OUTPUT_SUFFIXES
+        compressor.submit(
+            DEST_DIR / rel_path
+            for rel_path in manifest.static
+            if rel_path.endswith(suffixes)
+        )
+    else:
+        # Outputs change without their siblings, which would then be served
+        # out of date; remove them and start over next time.
+        for rel_path in manifest.compressed:
+            remove_siblings(DEST_DIR / rel_path)
+        manifest.compressed = {}
+    succeeded = False
+    try:
+        stats = generate_pages_recursive(
+            CONTENT_DIR,
+            DEST_DIR,
+            TEMPLATE_PATH,
+            args.basepath,
+            manifest,
+            jobs=args.jobs,
+            profiler=profiler,
+            cache=cache,
+            io_threads=args.io_threads,
+            static_dir=STATIC_DIR,
+            explain=args.explain,
+            site_url=args.site_url,
+            search_index=args.search_index,
+            compressor=compressor,
+        )
+        succeeded = True
+        return stats
+    finally:
+        if compressor is not None:
+            with prof.stage("compress"):
+                if compressor.settings_changed():
+                    # Pages skipped by this build still have siblings made
+                    # with the old settings, or none at all.
+                    compressor.submit_tree(OUTPUT_SUFFIXES, exclude=manifest.static)
+                compressed = compressor.wait()
+                removed = 0
+                if succeeded:
+                    removed = compressor.remove_orphans(keep=manifest.static)
+                manifest.compressed = compressor.stamps
+            print(f"Compressed {compressed} file(s), removed {removed} stale")
+        if cache is not None:
+            with prof.stage("cache_evict"):
+                evicted = cache.evict()
+            print(f"{cache.summary()}, {evicted} evicted")
+
+
+def generate_pages_recursive(
+    content_dir,
+    dest_dir,
+    template_path,
+    basepath,
+    manifest=None,
+    jobs=1,
+    profiler=None,
+    cache=None,
+    io_threads=0,
+    static_dir=None,
+    explain=False,
+    site_url=None,
+    search_index=False,
+    compressor=None,
+):
+    # compressor, a compress.Precompressor, is handed each page output as
+    # soon as it is written; without one, rewritten outputs lose their
+    # precompressed siblings instead.
+    if manifest is None:
+        manifest = BuildManifest()
+
+    def output_done(path, written):
+        if compressor is not None:
+            compressor.submit([path])
+        elif written:
+            remove_siblings(path)
+
+    # The feed and the search index need each page's text, which is taken
+    # from the tree the page was rendered from rather than a second parse.
+    with_text = site_url is not None or search_index
+    search_entries = None
+    if search_index:
+        search_entries = load_search_index(dest_dir / SEARCH_INDEX_NAME)
+    prof = profiler or NULL_PROFILER
+    template_hash = hash_file(template_path)
+    stats = {
+        "rendered": 0,
+        "cached": 0,
+        "skipped": 0,
+        "written": 0,
+        "unchanged": 0,
+        "pruned": 0,
+        "failed": 0,
+        "inline_hits": 0,
+        "inline_misses": 0,
+    }
+    stamps = {}
+    stale = []
+    failures = []
+
+    with prof.stage("plan"):
+        plan = plan_pages(content_dir, dest_dir, manifest.static, manifest.pages)
+    seen = {key for key, _, _, _ in plan.pages}
+    for key, md_path, error in plan.collisions:
+        # keep the colliding page's old entry, so its output (now someone
+        # else's file) is not pruned
+        seen.add(key)
+        failures.append((md_path, error))
+
+    for key, md_path, html_path, output in plan.pages:
+        with prof.stage("hash", md_path):
+            source_hash = hash_file(md_path)
+        reasons = manifest.explain(key, source_hash, template_hash, basepath, output)
+        entry = manifest.pages.get(key)
+        if entry is not None and static_dir is not None:
+            reasons += [
+                f"asset {path} changed"
+                for path in changed_assets(entry.get("assets", {}), static_dir, stamps)
+            ]
+        if entry is not None and (
+            (site_url is not None and "summary" not in entry)
+            or (search_index and page_path(basepath, output) not in search_entries)
+        ):
+            reasons.append("not yet indexed")
+        if not html_path.exists():
+            reasons.append("output missing")
+        if not reasons:
+            stats["skipped"] += 1
+            continue
+        if explain:
+            print(f"Rebuilding {key}: {', '.join(reasons)}")
+        stale.append((key, md_path, html_path, source_hash, output))
+
+    with prof.stage("mkdir"):
+        create_directories(html_path for _, _, html_path, _, _ in stale)
+
+    def index_page(key, output, text):
+        if search_entries is not None:
+            path = page_path(basepath, output)
+            title = manifest.pages[key]["title"]
+            search_entries[path] = {"path": path, "title": title, "text": text}
+
+    pending = []
+    for key, md_path, html_path, source_hash, output in stale:
+        if cache is not None:
+            # With artifacts, only pages cached with their text are reused
+            with prof.stage("cache_fetch", md_path):
+                cache_key = render_key(source_hash, template_hash, basepath)
+                cached = cache.lookup(cache_key, with_text)
+                text = None
+                if cached is not None and with_text:
+                    text = cache.load_text(cache_key)
+                    if text is None:
+                        cached = None
+                if cached is not None:
+                    written = copy_atomic(cached, html_path)
+            if cached is not None:
+                output_done(html_path, written)
+                title, refs = scan_page(md_path)
+                record_page(
+                    manifest,
+                    key,
+                    source_hash,
+                    template_hash,
+                    basepath,
+                    output,
+                    content_dir,
+                    title,
+                    refs,
+                    static_dir,
+                    text,
+                    stamps,
+                )
+                index_page(key, output, text)
+                stats["cached"] += 1
+                stats["written" if written else "unchanged"] += 1
+                continue
+        pending.append((key, md_path, html_path, source_hash, output))
+
+    progress = Progress(len(pending))
+
+    def page_done(html_path, outcome):
+        progress.advance()
+        if not isinstance(outcome, Exception):
+            output_done(html_path, outcome[0])
+
+    # Pages rendered in this process show up in the local cache counters;
+    # render_pages adds the counts reported back by worker processes.
+    inline_before = inline_cache_info()
+    results = render_pages(
+        [(md_path, html_path) for _, md_path, html_path, _, _ in pending],
+        template_path,
+        basepath,
+        jobs,
+        profiler,
+        io_threads,
+        with_text,
+        stats,
+        make_dirs=False,
+        on_page=page_done,
+    )
+    inline_after = inline_cache_info()
+    stats["inline_hits"] += inline_after.hits - inline_before.hits
+    stats["inline_misses"] += inline_after.misses - inline_before.misses
+    for (key, md_path, html_path, source_hash, output), outcome in zip(
+        pending, results
+    ):
+        if isinstance(outcome, Exception):
+            failures.append((md_path, outcome))
+            continue
+        written, text, title, refs = outcome
+        record_page(
+            manifest,
+            key,
+            source_hash,
+            template_hash,
+            basepath,
+            output,
+            content_dir,
+            title,
+            refs,
+            static_dir,
+            text,
+            stamps,
+        )
+        index_page(key, output, text)
+        stats["rendered"] += 1
+        stats["written" if written else "unchanged"] += 1
+        if cache is not None:
+            with prof.stage("cache_store", md_path):
+                cache.store(
+                    render_key(source_hash, template_hash, basepath), html_path, text
+                )
+    stats["failed"] = len(failures)
+
+    for key in manifest.stale_keys(seen):
+        entry = manifest.remove(key)
+        prune_output(dest_dir, dest_dir / entry["output"])
+        stats["pruned"] += 1
+
+    if with_text:
+        with prof.stage("artifacts"):
+            updated = write_artifacts(
+                dest_dir, manifest, basepath, site_url, search_entries
+            )
+        if updated:
+            print(f"Updated {', '.join(updated)}")
+        for name in updated:
+            output_done(dest_dir / name, True)
+
+    print(
+        f"Rendered {stats['rendered']} pages, reused {stats['cached']} from cache, "
+        f"skipped {stats['skipped']} unchanged, pruned {stats['pruned']} stale"
+    )
+    print(
+        f"Output: {stats['written']} written, {stats['unchanged']} identical "
+        f"and left untouched, {stats['pruned']} deleted"
+    )
+    lookups = stats["inline_hits"] + stats["inline_misses"]
+    if lookups:
+        print(
+            f"Inline cache: {stats['inline_hits']} hits, "
+            f"{stats['inline_misses']} misses "
+            f"({stats['inline_hits'] / lookups:.0%} hit rate)"
         )
+    if failures:
+        raise BuildError(failures, stats)
+    return stats
+
+
+def page_paths(content_dir, dest_dir, md_path):
+    rel_path = md_path.relative_to(content_dir)
+    output = rel_path.with_suffix(".html").as_posix()
+    return rel_path.as_posix(), dest_dir / output, output
+
+
+def record_page(
+    manifest,
+    key,
+    source_hash,
+    template_hash,
+    basepath,
+    output,
+    content_dir,
+    title,
+    refs,
+    static_dir=None,
+    text=None,
+    stamps=None,
+):
+    # title and refs come from rendering the page (see generate_page), or
+    # from scan_page when the output was reused without rendering.
+    assets, links = resolve_dependencies(refs, content_dir, static_dir, stamps)
+    manifest.record(
+        key,
+        source_hash,
+        template_hash,
+        basepath,
+        output,
+        assets,
+        links,
+        title,
+        None if text is None else summarize(text),
+    )
+
 
+def scan_page(md_path):
+    # The title and references of a page that is not being rendered.
+    if should_stream(md_path):
+        with map_source(md_path) as source:
+            title = extract_mapped_title(source)
+            return title, page_references(iter_source_blocks(source))
+    with open(md_path, "r", encoding="utf-8") as file:
+        markdown = file.read()
+    return extract_title(markdown), page_references(markdown)
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+
+def render_pages(
+    pages,
+    template_path,
+    basepath,
+    jobs=1,
+    profiler=None,
+    io_threads=0,
+    with_text=False,
+    stats=None,
+    make_dirs=True,
+    on_page=None,
+):
+    # Returns, per page, either the exception it failed with or the
+    # (written, text, title, refs) tuple from generate_page. Inline cache
+    # counts from worker processes are added to stats. make_dirs=False
+    # means the output directories already exist. on_page(html_path,
+    # outcome) is called as each page finishes.
+    if jobs <= 1 and io_threads > 0 and len(pages) > 1:
+        return render_pages_pipelined(
+            pages,
+            template_path,
+            basepath,
+            io_threads,
+            profiler=profiler,
+            with_text=with_text,
+            make_dirs=make_dirs,
+            on_page=on_page,
+        )
+    if jobs <= 1 or len(pages) <= 1:
+        results = []
+        for md_path, html_path in pages:
+            try:
+                result = generate_page(
+                    md_path,
+                    template_path,
+                    html_path,
+                    basepath,
+                    profiler=profiler,
+                    with_text=with_text,
+                    make_dirs=make_dirs,
+                )
+            except Exception as error:
+                result = error
+            results.append(result)
+            if on_page is not None:
+                on_page(html_path, result)
+        return results
+
+    results = []
+    worker = generate_page if profiler is None else profile_page
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                count_inline,
+                worker,
+                md_path,
+                template_path,
+                html_path,
+                basepath,
+                False,
+                with_text=with_text,
+                make_dirs=make_dirs,
+            )
+            for md_path, html_path in pages
+        ]
+        for (md_path, html_path), future in zip(pages, futures):
+            print(
+                f"Generating page from {md_path} to {html_path} using {template_path}"
+            )
+            try:
+                result, (hits, misses) = future.result()
+            except Exception as error:
+                result = error
+            else:
+                if stats is not None:
+                    stats["inline_hits"] += hits
+                    stats["inline_misses"] += misses
+                if profiler is not None:
+                    result, events = result
+                    profiler.merge(events)
+            results.append(result)
+            if on_page is not None:
+                on_page(html_path, result)
+    return results
+
+
+def count_inline(worker, *args, **kwargs):
+    # Runs in a worker process; returns the result along with the inline
+    # cache hits and misses the page caused there.
+    before = inline_cache_info()
+    result = worker(*args, **kwargs)
+    after = inline_cache_info()
+    return result, (after.hits - before.hits, after.misses - before.misses)
+
+
+def profile_page(
+    from_path,
+    template_path,
+    dest_path,
+    basepath,
+    verbose=True,
+    with_text=False,
+    make_dirs=True,
+):
+    # Runs in a worker process; the events are merged by the parent.
+    profiler = BuildProfiler()
+    result = generate_page(
+        from_path,
+        template_path,
+        dest_path,
+        basepath,
+        verbose,
+        profiler,
+        with_text,
+        make_dirs,
+    )
+    return result, profiler.events
+
+
+def prune_output(dest_dir, html_path):
+    print(f"Removing stale page {html_path}")
+    html_path.unlink(missing_ok=True)
+    remove_siblings(html_path)
+    remove_empty_parents(html_path, dest_dir)
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    basepath,
+    verbose=True,
+    profiler=None,
+    with_text=False,
+    make_dirs=True,
+):
+    # Returns (written, text, title, refs): whether the output file was
+    # (re)written; the page's plain text for the feed and search index, or
+    # None unless with_text is set; its title; and the root-relative paths
+    # it references, for the dependency graph.
+    if verbose:
+        print(
+            f"Generating page from {from_path} to {dest_path} using {template_path}"
+        )
+    if should_stream(from_path):
+        prof = profiler or NULL_PROFILER
+        with prof.stage("page", from_path), prof.stage("stream", from_path):
+            return generate_page_streamed(
+                from_path, template_path, dest_path, basepath, with_text, make_dirs
+            )
+    if profiler is not None:
+        with profiler.stage("page", from_path):
+            return generate_page_profiled(
+                from_path,
+                template_path,
+                dest_path,
+                basepath,
+                profiler,
+                with_text,
+                make_dirs,
+            )
 
     with open(from_path, "r", encoding="utf-8") as file:
         markdown_content = file.read()
 
-    with open(template_path, "r", encoding="utf-8") as file:
-        template_content = file.read()
-
-    html_content = markdown_to_html_node(markdown_content).to_html()
+    template = load_template(template_path, basepath)
+    node = markdown_to_page_node(markdown_content)
     title = extract_title(markdown_content)
-    page_content = template_content.replace("{{ Title }}", title).replace(
-        "{{ Content }}", html_content
+
+    if make_dirs:
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    written = write_atomic(
+        dest_path,
+        lambda file: template.write(file, Title=title, Content=node.iter_html()),
     )
+    text = node_text(node) if with_text else None
+    return written, text, title, page_references(markdown_content)
+
 
-    page_content = page_content.replace('href="/', f'href="{basepath}')
-    page_content = page_content.replace('src="/', f'src="{basepath}')
+def generate_page_profiled(
+    from_path,
+    template_path,
+    dest_path,
+    basepath,
+    profiler,
+    with_text=False,
+    make_dirs=True,
+):
+    # Same steps as generate_page, but with to_html, template substitution
+    # and the write done one after another so each can be timed.
+    with profiler.stage("read", from_path):
+        with open(from_path, "r", encoding="utf-8") as file:
+            markdown_content = file.read()
 
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    with profiler.stage("load_template", from_path):
+        template = load_template(template_path, basepath)
+    with profiler.stage("convert", from_path):
+        # text_to_children is the entry point for all inline text, whether
+        # it takes the plain-text fast path, the memo or the tokenizer.
+        with profiler.instrument(convert, "text_to_children", "inline", from_path):
+            node = markdown_to_page_node(markdown_content)
+    with profiler.stage("extract_title", from_path):
+        title = extract_title(markdown_content)
+    with profiler.stage("to_html", from_path):
+        html_content = node.to_html()
+    with profiler.stage("template", from_path):
+        page_content = template.render(Title=title, Content=html_content)
 
-    with open(dest_path, "w", encoding="utf-8") as file:
-        file.write(page_content)
+    with profiler.stage("write", from_path):
+        if make_dirs:
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+        written = write_text_atomic(dest_path, page_content)
+    with profiler.stage("deps", from_path):
+        refs = page_references(markdown_content)
+    if not with_text:
+        return written, None, title, refs
+    with profiler.stage("text", from_path):
+        return written, node_text(node), title, refs
 
 
 if __name__ == "__main__":
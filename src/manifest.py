@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from version import render_fingerprint
+
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 16):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, pages=None, static=None, compressed=None):
+        self.pages = pages if pages is not None else {}
+        self.static = static if static is not None else []
+        # output path -> stamp of its precompressed siblings
+        self.compressed = compressed if compressed is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls()
+        return cls(
+            data.get("pages", {}), data.get("static", []), data.get("compressed", {})
+        )
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "pages": self.pages,
+                    "static": sorted(self.static),
+                    "compressed": self.compressed,
+                },
+                file,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, key, source_hash, template_hash, basepath, output):
+        return not self.explain(key, source_hash, template_hash, basepath, output)
+
+    def explain(self, key, source_hash, template_hash, basepath, output):
+        entry = self.pages.get(key)
+        if entry is None:
+            return ["no previous build"]
+        reasons = []
+        if entry.get("source") != source_hash:
+            reasons.append("source changed")
+        if entry.get("template") != template_hash:
+            reasons.append("template changed")
+        if entry.get("basepath") != basepath:
+            reasons.append("basepath changed")
+        if entry.get("output") != output:
+            reasons.append("output path changed")
+        if entry.get("renderer") != render_fingerprint():
+            reasons.append("sitegen changed")
+        return reasons
+
+    def record(
+        self,
+        key,
+        source_hash,
+        template_hash,
+        basepath,
+        output,
+        assets=None,
+        links=None,
+        title=None,
+        summary=None,
+    ):
+        entry = {
+            "source": source_hash,
+            "template": template_hash,
+            "basepath": basepath,
+            "output": output,
+            # the converter code the page was rendered with
+            "renderer": render_fingerprint(),
+            "assets": assets or {},
+            "links": links or [],
+            "title": title,
+        }
+        if summary is not None:
+            entry["summary"] = summary
+        self.pages[key] = entry
+
+    def dependents(self, assets):
+        # Pages whose recorded dependencies include any of the given static
+        # asset paths.
+        assets = set(assets)
+        return sorted(
+            key
+            for key, entry in self.pages.items()
+            if assets.intersection(entry.get("assets", ()))
+        )
+
+    def stale_keys(self, seen_keys):
+        return sorted(key for key in self.pages if key not in seen_keys)
+
+    def remove(self, key):
+        return self.pages.pop(key, None)
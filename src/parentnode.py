@@ -2,14 +2,29 @@ from htmlnode import HTMLNode
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("Parent node must have a tag")
-        if self.children is None or self.children == []:
-            raise ValueError("Parent node must have children")
+        return "".join(self.iter_html())
 
-        children_html = "".join([child.to_html() for child in self.children])
-        return f"<{self.tag}>{children_html}</{self.tag}>"
+    def iter_html(self):
+        # Walk the tree with an explicit stack so deeply nested documents
+        # neither hit the recursion limit nor build per-level strings.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode):
+                if node.tag is None:
+                    raise ValueError("Parent node must have a tag")
+                if not node.children:
+                    raise ValueError("Parent node must have children")
+                yield f"<{node.tag}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield node.to_html()
@@ -1,6 +1,132 @@
 import re
 from textnode import TextNode, TextType
 
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_RE = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+
+class InlineType:
+    # Text type for inline syntax added through the registry; render turns
+    # a TextNode of this type into an HTMLNode.
+    __slots__ = ("value", "render")
+
+    def __init__(self, value, render):
+        self.value = value
+        self.render = render
+
+    def __repr__(self):
+        return f"InlineType({self.value})"
+
+
+class InlineRegistry:
+    # Inline rules keyed by the characters that can start them. A rule is
+    # called as match(text, i) at a trigger character and returns
+    # (TextNode, end) or None. The triggers are compiled into a single
+    # character class, so text without any of them is never looked at
+    # more than once.
+    def __init__(self):
+        self.rules = {}
+        self.version = 0
+        self.compile()
+
+    def register(self, triggers, match, first=False):
+        for char in triggers:
+            rules = self.rules.setdefault(char, [])
+            if first:
+                rules.insert(0, match)
+            else:
+                rules.append(match)
+        self.compile()
+
+    def compile(self):
+        # version lets caches of tokenized text tell the rules changed
+        self.version += 1
+        self.dispatch = {char: tuple(rules) for char, rules in self.rules.items()}
+        triggers = "".join(sorted(self.dispatch))
+        pattern = f"[{re.escape(triggers)}]" if triggers else r"(?!)"
+        self.search = re.compile(pattern).search
+
+    def tokenize(self, text):
+        nodes = []
+        search = self.search
+        dispatch = self.dispatch
+        length = len(text)
+        start = 0
+        i = 0
+
+        while i < length:
+            found = search(text, i)
+            if found is None:
+                break
+            i = found.start()
+            for match in dispatch[text[i]]:
+                result = match(text, i)
+                if result is not None:
+                    break
+            else:
+                # e.g. a lone "*" or "!" is not markup
+                i += 1
+                continue
+            node, end = result
+            if i > start:
+                nodes.append(TextNode(text[start:i], TextType.TEXT))
+            nodes.append(node)
+            i = start = end
+
+        if start < length or not nodes:
+            nodes.append(TextNode(text[start:], TextType.TEXT))
+        return nodes
+
+
+def match_image(text, i):
+    image = IMAGE_RE.match(text, i)
+    if image is None:
+        return None
+    return TextNode(image.group(1), TextType.IMAGE, image.group(2)), image.end()
+
+
+def match_link(text, i):
+    if i > 0 and text[i - 1] == "!":
+        return None
+    link = LINK_RE.match(text, i)
+    if link is None:
+        return None
+    return TextNode(link.group(1), TextType.LINK, link.group(2)), link.end()
+
+
+def delimited(delimiter, text_type, required=True):
+    # Rule for text wrapped in delimiter on both sides. An unclosed
+    # delimiter is an error when required, and plain text otherwise.
+    size = len(delimiter)
+
+    def match(text, i):
+        if not text.startswith(delimiter, i):
+            return None
+        end = text.find(delimiter, i + size)
+        if end == -1:
+            if required:
+                raise ValueError(f"Closing delimeter {delimiter} not found")
+            return None
+        return TextNode(text[i + size : end], text_type), end + size
+
+    return match
+
+
+INLINE_SYNTAX = InlineRegistry()
+INLINE_SYNTAX.register("!", match_image)
+INLINE_SYNTAX.register("[", match_link)
+INLINE_SYNTAX.register("*", delimited("**", TextType.BOLD))
+INLINE_SYNTAX.register("_", delimited("_", TextType.ITALIC))
+INLINE_SYNTAX.register("`", delimited("`", TextType.CODE))
+
+
+def register_inline(triggers, match, first=False):
+    INLINE_SYNTAX.register(triggers, match, first)
+
+
+def tokenize_inline(text):
+    return INLINE_SYNTAX.tokenize(text)
+
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
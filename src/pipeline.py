@@ -0,0 +1,192 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import convert
+from arena import markdown_to_page_node
+from artifacts import node_text
+from convert import extract_title
+from deps import page_references
+from profiler import NULL_PROFILER
+from stream import generate_page_streamed, should_stream
+from template import load_template
+from writer import write_atomic, write_text_atomic
+
+
+def read_source(md_path, profiler):
+    # Large sources are left to be streamed from a memory map; None
+    # tells the caller to do so.
+    if should_stream(md_path):
+        return None
+    with profiler.stage("read", md_path):
+        with open(md_path, "r", encoding="utf-8") as file:
+            return file.read()
+
+
+def source_size(md_path):
+    # What reading md_path holds in memory; streamed sources are mapped
+    # instead of read. Errors surface from read_source.
+    try:
+        return 0 if should_stream(md_path) else os.path.getsize(md_path)
+    except OSError:
+        return 0
+
+
+def write_output(
+    md_path, html_path, template, title, node, profiler, make_dirs=True
+):
+    # The tree is rendered straight into the file, as in generate_page,
+    # rather than into a string held until the write. When profiling,
+    # to_html and template substitution run one after another instead, as
+    # in generate_page_profiled, so each can be timed. Returns whether the
+    # file was written and how long it all took.
+    start = time.perf_counter()
+    if profiler is NULL_PROFILER:
+        if make_dirs:
+            html_path.parent.mkdir(parents=True, exist_ok=True)
+        written = write_atomic(
+            html_path,
+            lambda file: template.write(file, Title=title, Content=node.iter_html()),
+        )
+        return written, time.perf_counter() - start
+
+    with profiler.stage("to_html", md_path):
+        html_content = node.to_html()
+    with profiler.stage("template", md_path):
+        page_content = template.render(Title=title, Content=html_content)
+    with profiler.stage("write", md_path):
+        if make_dirs:
+            html_path.parent.mkdir(parents=True, exist_ok=True)
+        written = write_text_atomic(html_path, page_content)
+    return written, time.perf_counter() - start
+
+
+def render_pages_pipelined(
+    pages,
+    template_path,
+    basepath,
+    io_threads=4,
+    queue_size=64,
+    profiler=None,
+    with_text=False,
+    make_dirs=True,
+    on_page=None,
+    queue_bytes=32 * 1024 * 1024,
+):
+    # Reads run ahead of conversion and writes trail behind it on I/O
+    # threads, each bounded to queue_size pages in flight, so the
+    # CPU-bound conversion in this thread rarely waits on storage. Both
+    # queues are also bounded by the size of their sources, queue_bytes in
+    # total each, so a run of large pages does not hold queue_size of
+    # them in memory.
+    prof = profiler or NULL_PROFILER
+    template = load_template(template_path, basepath)
+    results = [None] * len(pages)
+    writes = deque()
+    queued_bytes = 0
+
+    def finish(index, outcome):
+        results[index] = outcome
+        if on_page is not None:
+            on_page(pages[index][1], outcome)
+
+    def finish_write():
+        nonlocal queued_bytes
+        index, size, seconds, page, future = writes.popleft()
+        queued_bytes -= size
+        try:
+            written, write_seconds = future.result()
+            prof.record("page", pages[index][0], seconds + write_seconds)
+            finish(index, (written,) + page)
+        except Exception as error:
+            finish(index, error)
+
+    with ThreadPoolExecutor(
+        io_threads, thread_name_prefix="sitegen-read"
+    ) as readers, ThreadPoolExecutor(
+        io_threads, thread_name_prefix="sitegen-write"
+    ) as writers:
+        reads = deque()
+        read_bytes = 0
+        next_read = 0
+
+        for index, (md_path, html_path) in enumerate(pages):
+            while next_read < len(pages) and len(reads) < queue_size:
+                next_path = pages[next_read][0]
+                size = source_size(next_path)
+                if reads and read_bytes + size > queue_bytes:
+                    break
+                read_bytes += size
+                future = readers.submit(read_source, next_path, prof)
+                reads.append((size, future))
+                next_read += 1
+
+            print(
+                f"Generating page from {md_path} to {html_path} using {template_path}"
+            )
+            size, future = reads.popleft()
+            read_bytes -= size
+            try:
+                markdown_content = future.result()
+                if markdown_content is None:
+                    with prof.stage("page", md_path), prof.stage(
+                        "stream", md_path
+                    ):
+                        result = generate_page_streamed(
+                            md_path,
+                            template_path,
+                            html_path,
+                            basepath,
+                            with_text,
+                            make_dirs,
+                        )
+                    finish(index, result)
+                    continue
+                start = time.perf_counter()
+                with prof.stage("convert", md_path), prof.instrument(
+                    convert, "text_to_children", "inline", md_path
+                ):
+                    node = markdown_to_page_node(markdown_content)
+                with prof.stage("extract_title", md_path):
+                    title = extract_title(markdown_content)
+                with prof.stage("deps", md_path):
+                    refs = page_references(markdown_content)
+                if with_text:
+                    with prof.stage("text", md_path):
+                        text = node_text(node)
+                else:
+                    text = None
+                seconds = time.perf_counter() - start
+            except Exception as error:
+                finish(index, error)
+                continue
+
+            size = len(markdown_content)
+            while writes and (
+                len(writes) >= queue_size or queued_bytes + size > queue_bytes
+            ):
+                finish_write()
+            queued_bytes += size
+            writes.append(
+                (
+                    index,
+                    size,
+                    seconds,
+                    (text, title, refs),
+                    writers.submit(
+                        write_output,
+                        md_path,
+                        html_path,
+                        template,
+                        title,
+                        node,
+                        prof,
+                        make_dirs,
+                    ),
+                )
+            )
+
+        while writes:
+            finish_write()
+    return results
@@ -0,0 +1,115 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from staticsync import walk_files
+
+
+class PagePlan:
+    # The work list for one build: every page's key, source and output,
+    # found in a single scandir walk, plus the pages that cannot be built
+    # because another page or a static file claims the same output.
+    def __init__(self, pages, collisions):
+        self.pages = pages
+        self.collisions = collisions
+
+    def __len__(self):
+        return len(self.pages)
+
+
+def plan_pages(content_dir, dest_dir, static_files=(), known=(), fold_case=None):
+    # Static files always keep their output. Between pages, those in known
+    # (the previous build's) win over new ones, so adding a page never
+    # breaks one that built before. Outputs are compared case-insensitively
+    # only where dest_dir's filesystem is; fold_case=None probes it.
+    content_dir = Path(content_dir)
+    dest_dir = Path(dest_dir)
+    if fold_case is None:
+        fold_case = case_insensitive(dest_dir)
+    fold = str.casefold if fold_case else str
+    keys = sorted(
+        (path for path in walk_files(content_dir) if path.endswith(".md")),
+        key=lambda path: path.split("/"),
+    )
+    known = set(known)
+    claimed = {fold(path): f"static file {path}" for path in static_files}
+    winners = set()
+    for key in sorted(keys, key=lambda key: key not in known):
+        output = fold(key[: -len(".md")] + ".html")
+        if output not in claimed:
+            claimed[output] = f"page {key}"
+            winners.add(key)
+    pages = []
+    collisions = []
+    for key in keys:
+        output = key[: -len(".md")] + ".html"
+        md_path = content_dir / key
+        if key not in winners:
+            owner = claimed[fold(output)]
+            error = ValueError(f"output {output} is also written by {owner}")
+            collisions.append((key, md_path, error))
+            continue
+        pages.append((key, md_path, dest_dir / output, output))
+    return PagePlan(pages, collisions)
+
+
+def case_insensitive(directory):
+    # Whether the filesystem holding directory (created if missing) treats
+    # names that differ only in case as the same file.
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(prefix="Case", dir=directory) as file:
+        return os.path.exists(
+            os.path.join(directory, os.path.basename(file.name).swapcase())
+        )
+
+
+def create_directories(paths):
+    # mkdir each distinct parent once, instead of once per page. Returns
+    # the number of directories checked.
+    directories = sorted({path.parent for path in paths})
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+    return len(directories)
+
+
+class Progress:
+    # Prints "done/total" with the rate and an ETA at most once per
+    # interval, so small builds stay quiet and large ones show movement.
+    def __init__(self, total, interval=1.0, file=None):
+        self.total = total
+        self.interval = interval
+        self.file = file or sys.stdout
+        self.done = 0
+        self.start = time.perf_counter()
+        self.last = self.start
+
+    def advance(self, count=1):
+        self.done += count
+        now = time.perf_counter()
+        if now - self.last >= self.interval and self.done < self.total:
+            self.last = now
+            print(self.report(now), file=self.file)
+
+    def report(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 else 0.0
+        return (
+            f"Progress: {self.done}/{self.total} pages "
+            f"({self.done / self.total:.0%}), {rate:.0f} pages/s, "
+            f"ETA {format_duration(remaining)}"
+        )
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
@@ -0,0 +1,176 @@
+import contextlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+
+class BuildProfiler:
+    def __init__(self):
+        self.events = []
+        self.origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name, page=None):
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append(
+                {
+                    "name": name,
+                    "page": None if page is None else str(page),
+                    "start": start,
+                    "duration": time.perf_counter() - start,
+                    "blocks": sys.getallocatedblocks() - blocks,
+                    "pid": os.getpid(),
+                }
+            )
+
+    @contextlib.contextmanager
+    def instrument(self, module, attr, name, page=None):
+        # Accumulate the time spent in module.attr while the block runs and
+        # record it as one aggregate event, without a trace timestamp.
+        func = getattr(module, attr)
+        total = 0.0
+        calls = 0
+
+        def timed(*args, **kwargs):
+            nonlocal total, calls
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                total += time.perf_counter() - start
+                calls += 1
+
+        setattr(module, attr, timed)
+        try:
+            yield
+        finally:
+            setattr(module, attr, func)
+            self.events.append(
+                {
+                    "name": name,
+                    "page": None if page is None else str(page),
+                    "start": None,
+                    "duration": total,
+                    "blocks": 0,
+                    "calls": calls,
+                    "pid": os.getpid(),
+                }
+            )
+
+    def record(self, name, page, seconds):
+        # For work that is not one contiguous block on one thread, such
+        # as a pipelined page converted here and written elsewhere.
+        self.events.append(
+            {
+                "name": name,
+                "page": None if page is None else str(page),
+                "start": None,
+                "duration": seconds,
+                "blocks": 0,
+                "pid": os.getpid(),
+            }
+        )
+
+    def merge(self, events):
+        self.events.extend(events)
+
+    def stage_totals(self):
+        totals = {}
+        for event in self.events:
+            if event["name"] == "page":
+                continue
+            total = totals.setdefault(
+                event["name"], {"seconds": 0.0, "count": 0, "blocks": 0}
+            )
+            total["seconds"] += event["duration"]
+            total["count"] += 1
+            total["blocks"] += event["blocks"]
+        return totals
+
+    def page_totals(self):
+        pages = {}
+        for event in self.events:
+            if event["name"] == "page":
+                pages[event["page"]] = {
+                    "seconds": event["duration"],
+                    "blocks": event["blocks"],
+                }
+        return pages
+
+    def summary(self, top=10):
+        lines = ["Stage                 total ms   count   avg ms   alloc blocks"]
+        stages = sorted(
+            self.stage_totals().items(), key=lambda item: -item[1]["seconds"]
+        )
+        for name, total in stages:
+            lines.append(
+                f"{name:<20} {total['seconds'] * 1000:>9.1f} {total['count']:>7} "
+                f"{total['seconds'] * 1000 / total['count']:>8.3f} {total['blocks']:>14}"
+            )
+
+        pages = sorted(self.page_totals().items(), key=lambda item: -item[1]["seconds"])
+        if pages:
+            lines.append("")
+            lines.append(f"Slowest {min(top, len(pages))} of {len(pages)} pages:")
+            for page, total in pages[:top]:
+                lines.append(
+                    f"  {total['seconds'] * 1000:>9.2f} ms {total['blocks']:>10} blocks  "
+                    f"{page}"
+                )
+        return "\n".join(lines)
+
+    def trace_events(self):
+        trace = []
+        for event in self.events:
+            if event["start"] is None:
+                continue
+            args = {"alloc_blocks": event["blocks"]}
+            if event["page"] is not None:
+                args["page"] = event["page"]
+            trace.append(
+                {
+                    "name": event["name"],
+                    "cat": "sitegen",
+                    "ph": "X",
+                    "ts": (event["start"] - self.origin) * 1e6,
+                    "dur": event["duration"] * 1e6,
+                    "pid": event["pid"],
+                    "tid": event["pid"],
+                    "args": args,
+                }
+            )
+        return trace
+
+    def write_trace(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "traceEvents": self.trace_events(),
+                    "displayTimeUnit": "ms",
+                    "stages": self.stage_totals(),
+                    "pages": self.page_totals(),
+                },
+                file,
+            )
+
+
+class NullProfiler:
+    def stage(self, name, page=None):
+        return contextlib.nullcontext()
+
+    def instrument(self, module, attr, name, page=None):
+        return contextlib.nullcontext()
+
+    def record(self, name, page, seconds):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from version import render_fingerprint
+
+
+def render_key(source_hash, template_hash, basepath):
+    digest = hashlib.sha256()
+    for part in (render_fingerprint(), source_hash, template_hash, basepath):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class RenderCache:
+    # Rendered pages keyed by render_key, each optionally with a .txt
+    # sidecar holding the page text that feed and search-index builds need.
+    def __init__(self, root, max_bytes=1 << 30):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def path_for(self, key):
+        return self.root / key[:2] / f"{key}.html"
+
+    def text_path_for(self, key):
+        return self.root / key[:2] / f"{key}.txt"
+
+    def lookup(self, key, with_text=False):
+        # With with_text, entries stored without their text are misses.
+        path = self.path_for(key)
+        try:
+            if with_text:
+                os.stat(self.text_path_for(key))
+            # mtime doubles as the last-used time for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def load_text(self, key):
+        try:
+            return self.text_path_for(key).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def store(self, key, src_path, text=None):
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The text goes first, so an entry found with_text has it.
+        if text is not None:
+            self.replace(
+                self.text_path_for(key),
+                lambda tmp_path: tmp_path.write_text(text, encoding="utf-8"),
+            )
+        self.replace(path, lambda tmp_path: shutil.copyfile(src_path, tmp_path))
+        self.stores += 1
+
+    def replace(self, path, fill):
+        # Write under a unique name and rename so concurrent builds sharing
+        # the directory never see a partially written entry.
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            fill(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def entries(self):
+        if not self.root.is_dir():
+            return []
+        # An entry's size includes its text sidecar; sidecars left without
+        # their page are entries of their own.
+        entries = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            pages = []
+            texts = {}
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".html"):
+                    pages.append(entry)
+                elif entry.name.endswith(".txt"):
+                    texts[entry.path[: -len(".txt")]] = entry
+            for entry in pages:
+                stat = entry.stat()
+                text = texts.pop(entry.path[: -len(".html")], None)
+                size = stat.st_size + (0 if text is None else text.stat().st_size)
+                entries.append((stat.st_mtime_ns, size, entry.path))
+            for entry in texts.values():
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            if path.endswith(".html"):
+                Path(path[: -len(".html")] + ".txt").unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self):
+        return (
+            f"Render cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.stores} stored"
+        )
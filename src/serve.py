@@ -0,0 +1,682 @@
+import argparse
+import ctypes
+import os
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from arena import markdown_to_page_node
+from convert import extract_title
+from main import (
+    CONTENT_DIR,
+    DEST_DIR,
+    MANIFEST_PATH,
+    STATIC_DIR,
+    TEMPLATE_PATH,
+    BuildError,
+    build,
+    generate_page,
+    generate_pages_recursive,
+    page_paths,
+    parse_args,
+    prune_output,
+    record_page,
+)
+from manifest import BuildManifest, hash_file
+from staticsync import sync_static
+from template import load_template
+
+RELOAD_PATH = "/__sitegen/reload"
+RELOAD_SCRIPT = (
+    f'<script>new EventSource("{RELOAD_PATH}").onmessage = '
+    "() => location.reload();</script>"
+)
+
+
+def parse_serve_args(argv):
+    parser = argparse.ArgumentParser(prog="sitegen serve")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild on changes to content/, static/ and template.html",
+    )
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.1,
+        help="seconds between checks for changed files",
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="render pages when they are requested instead of building docs/; "
+        "static/ is served in place",
+    )
+    parser.add_argument(
+        "--preview-cache",
+        type=int,
+        default=256,
+        metavar="N",
+        help="with --lazy, keep up to N rendered pages in memory",
+    )
+    return parser.parse_args(argv)
+
+
+def serve_main(argv):
+    args = parse_serve_args(argv)
+    if args.lazy:
+        return serve_lazy(args)
+    build_args = parse_args([args.basepath])
+    manifest = BuildManifest.load(MANIFEST_PATH)
+    try:
+        build(build_args, manifest)
+    except BuildError as error:
+        print(error, file=sys.stderr)
+    manifest.save(MANIFEST_PATH)
+
+    notifier = ReloadNotifier()
+    watcher = None
+    if args.watch:
+        watcher = SiteWatcher(
+            CONTENT_DIR,
+            STATIC_DIR,
+            TEMPLATE_PATH,
+            DEST_DIR,
+            args.basepath,
+            manifest,
+            notifier.notify,
+        )
+        watcher.start(args.interval)
+
+    handler = partial(
+        LiveReloadHandler,
+        directory=str(DEST_DIR),
+        notifier=notifier if args.watch else None,
+        basepath=args.basepath,
+    )
+    server = ThreadingHTTPServer((args.bind, args.port), handler)
+    print(f"Serving {DEST_DIR} at http://{args.bind}:{args.port}{args.basepath}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if watcher is not None:
+            watcher.stop()
+        manifest.save(MANIFEST_PATH)
+
+
+def serve_lazy(args):
+    notifier = ReloadNotifier() if args.watch else None
+    renderer = PageRenderer(
+        CONTENT_DIR, TEMPLATE_PATH, args.basepath, args.preview_cache
+    )
+    stop = threading.Event()
+    if notifier is not None:
+        threading.Thread(
+            target=notify_changes,
+            args=(
+                [CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH],
+                notifier,
+                args.interval,
+                stop,
+            ),
+            name="sitegen-watch",
+            daemon=True,
+        ).start()
+
+    handler = partial(
+        LazyPreviewHandler,
+        directory=str(STATIC_DIR),
+        notifier=notifier,
+        renderer=renderer,
+    )
+    server = ThreadingHTTPServer((args.bind, args.port), handler)
+    print(
+        f"Previewing {CONTENT_DIR} at "
+        f"http://{args.bind}:{args.port}{args.basepath} (pages rendered on request)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        print(renderer.summary())
+
+
+def notify_changes(paths, notifier, interval, stop):
+    # Lazy mode has nothing to rebuild; a change only reloads the browser,
+    # which then asks for freshly rendered pages.
+    def snapshot():
+        return [
+            snapshot_tree(path) if path.is_dir() else path.stat().st_mtime_ns
+            for path in paths
+        ]
+
+    watch = open_watch(
+        [path for path in paths if path.is_dir()],
+        [path for path in paths if not path.is_dir()],
+    )
+    previous = snapshot()
+    try:
+        while not stop.wait(interval):
+            if watch is not None and not watch.changed():
+                continue
+            current = snapshot()
+            if current != previous:
+                previous = current
+                notifier.notify()
+    finally:
+        if watch is not None:
+            watch.close()
+
+
+def inject_reload_script(html):
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + RELOAD_SCRIPT
+    return html[:index] + RELOAD_SCRIPT + html[index:]
+
+
+def snapshot_tree(root, suffix=None):
+    files = {}
+    stack = [str(root)]
+    prefix = len(stack[0]) + 1
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif suffix is None or entry.name.endswith(suffix):
+                    stat = entry.stat()
+                    rel_path = entry.path[prefix:]
+                    if os.sep != "/":
+                        rel_path = rel_path.replace(os.sep, "/")
+                    files[rel_path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+# inotify(7) event bits
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatch:
+    # Tells the watchers whether anything under the watched trees (or the
+    # watched files) changed since the last call, so that an idle server
+    # checks for pending events instead of rescanning every tree each
+    # interval. The snapshots still decide what changed; events only say
+    # when to take them. Directories created later are watched as they
+    # appear.
+    def __init__(self, libc, trees, files=()):
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> (directory, names of interest or None for all)
+        self.dirs = {}
+        for tree in trees:
+            self.add_tree(tree)
+        for path in files:
+            path = Path(path)
+            self.add(str(path.parent), {path.name})
+
+    def add(self, directory, names=None):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            return
+        # Watching a directory twice returns the same descriptor.
+        if wd in self.dirs:
+            previous = self.dirs[wd][1]
+            names = None if names is None or previous is None else names | previous
+        self.dirs[wd] = (directory, names)
+
+    def add_tree(self, root):
+        stack = [str(root)]
+        while stack:
+            directory = stack.pop()
+            self.add(directory)
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+
+    def changed(self):
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                start = offset + EVENT_HEADER.size
+                name = os.fsdecode(data[start : start + length].rstrip(b"\0"))
+                offset = start + length
+                if mask & IN_Q_OVERFLOW:
+                    changed = True
+                    continue
+                watched = self.dirs.get(wd)
+                if watched is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self.dirs[wd]
+                    continue
+                directory, names = watched
+                if names is not None and name not in names:
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(os.path.join(directory, name))
+                changed = True
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watch(trees, files=()):
+    # An InotifyWatch, or None where inotify is not available and the
+    # trees have to be polled.
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return InotifyWatch(libc, trees, files)
+    except (AttributeError, OSError):
+        return None
+
+
+def diff_snapshots(old, new):
+    changed = sorted(key for key, value in new.items() if old.get(key) != value)
+    removed = sorted(key for key in old if key not in new)
+    return changed, removed
+
+
+class ReloadNotifier:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class SiteWatcher:
+    def __init__(
+        self,
+        content_dir,
+        static_dir,
+        template_path,
+        dest_dir,
+        basepath,
+        manifest,
+        on_rebuild=None,
+    ):
+        self.content_dir = Path(content_dir)
+        self.static_dir = Path(static_dir)
+        self.template_path = Path(template_path)
+        self.dest_dir = Path(dest_dir)
+        self.basepath = basepath
+        self.manifest = manifest
+        self.on_rebuild = on_rebuild
+        self.template_hash = hash_file(self.template_path)
+        self.pages = snapshot_tree(self.content_dir, ".md")
+        self.static = snapshot_tree(self.static_dir)
+        self.template_stat = self.stat_template()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stat_template(self):
+        stat = self.template_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def start(self, interval):
+        watch = open_watch([self.content_dir, self.static_dir], [self.template_path])
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(interval, watch),
+            name="sitegen-watch",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, interval, watch=None):
+        # With an inotify watch the trees are only rescanned after an event;
+        # otherwise every interval.
+        try:
+            # The first pass catches changes made before the watch was set up.
+            self.poll_logged()
+            while not self._stop.wait(interval):
+                if watch is None or watch.changed():
+                    self.poll_logged()
+        finally:
+            if watch is not None:
+                watch.close()
+
+    def poll_logged(self):
+        try:
+            self.poll()
+        except Exception as error:
+            print(f"Rebuild failed: {type(error).__name__}: {error}")
+
+    def poll(self):
+        pages = snapshot_tree(self.content_dir, ".md")
+        static = snapshot_tree(self.static_dir)
+        template_stat = self.stat_template()
+
+        changed_pages, removed_pages = diff_snapshots(self.pages, pages)
+        changed_static, removed_static = diff_snapshots(self.static, static)
+        template_changed = template_stat != self.template_stat
+        self.pages, self.static, self.template_stat = pages, static, template_stat
+
+        if not (
+            changed_pages
+            or removed_pages
+            or changed_static
+            or removed_static
+            or template_changed
+        ):
+            return False
+
+        start = time.perf_counter()
+        if changed_static or removed_static:
+            self.manifest.static, _ = sync_static(
+                self.static_dir, self.dest_dir, self.manifest.static
+            )
+        if template_changed:
+            self.template_hash = hash_file(self.template_path)
+            rendered = self.rebuild_all()
+        else:
+            # Pages that reference a changed static asset are rebuilt too.
+            dependents = self.manifest.dependents(changed_static + removed_static)
+            keys = sorted(set(changed_pages).union(dependents))
+            rendered = self.rebuild_pages(keys)
+        for key in removed_pages:
+            entry = self.manifest.remove(key)
+            if entry is not None:
+                prune_output(self.dest_dir, self.dest_dir / entry["output"])
+
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Rebuilt {rendered} page(s) in {elapsed:.1f} ms")
+        if self.on_rebuild is not None:
+            self.on_rebuild()
+        return True
+
+    def rebuild_all(self):
+        try:
+            stats = generate_pages_recursive(
+                self.content_dir,
+                self.dest_dir,
+                self.template_path,
+                self.basepath,
+                self.manifest,
+                static_dir=self.static_dir,
+            )
+        except BuildError as error:
+            print(error)
+            return error.stats["rendered"]
+        return stats["rendered"]
+
+    def rebuild_pages(self, keys):
+        rendered = 0
+        for key in keys:
+            md_path = self.content_dir / key
+            if not md_path.is_file():
+                continue
+            key, html_path, output = page_paths(
+                self.content_dir, self.dest_dir, md_path
+            )
+            try:
+                _, _, title, refs = generate_page(
+                    md_path, self.template_path, html_path, self.basepath
+                )
+            except Exception as error:
+                print(f"  {md_path}: {type(error).__name__}: {error}")
+                continue
+            record_page(
+                self.manifest,
+                key,
+                hash_file(md_path),
+                self.template_hash,
+                self.basepath,
+                output,
+                self.content_dir,
+                title,
+                refs,
+                self.static_dir,
+            )
+            rendered += 1
+        return rendered
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, notifier=None, basepath="/", **kwargs):
+        self.notifier = notifier
+        self.basepath = basepath
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.notifier is None:
+            return super().do_GET()
+        if self.path == RELOAD_PATH:
+            return self.stream_reload_events()
+
+        path = self.translate_path(self.path)
+        if self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            return super().do_GET()
+
+        with open(path, "r", encoding="utf-8") as file:
+            body = inject_reload_script(file.read()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        version = self.notifier.version
+        while True:
+            latest = self.notifier.wait(version, timeout=15)
+            message = b"data: reload\n\n" if latest != version else b": ping\n\n"
+            version = latest
+            try:
+                self.wfile.write(message)
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+    def translate_path(self, path):
+        # The site is served under the basepath its pages link with
+        if path.startswith(self.basepath):
+            path = "/" + path[len(self.basepath) :]
+        return super().translate_path(path)
+
+
+class PageRenderer:
+    # Renders content pages on demand and keeps the most recently used
+    # ones in memory. An entry is reused only while the source and the
+    # template have the same (mtime_ns, size) as when it was rendered.
+    def __init__(self, content_dir, template_path, basepath="/", max_pages=256):
+        self.content_dir = Path(content_dir)
+        self.template_path = Path(template_path)
+        self.basepath = basepath
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, url):
+        # Returns (md_path, redirect): the source for a request path, or
+        # the path with a trailing slash added when that is where the
+        # page lives. Both are None for anything that is not a page.
+        path = unquote(urlsplit(url).path)
+        if not path.startswith(self.basepath):
+            return None, None
+        rel_path = path[len(self.basepath) :]
+        if rel_path == "" or rel_path.endswith("/"):
+            candidates = [rel_path + "index.md"]
+        elif rel_path.endswith(".html"):
+            candidates = [rel_path[: -len(".html")] + ".md"]
+        else:
+            md_path = self.source(rel_path + "/index.md")
+            return None, (path + "/" if md_path is not None else None)
+        for candidate in candidates:
+            md_path = self.source(candidate)
+            if md_path is not None:
+                return md_path, None
+        return None, None
+
+    def source(self, rel_path):
+        md_path = self.content_dir / rel_path
+        try:
+            md_path.resolve().relative_to(self.content_dir.resolve())
+        except ValueError:
+            return None
+        return md_path if md_path.is_file() else None
+
+    def stamp(self, md_path):
+        source = os.stat(md_path)
+        template = os.stat(self.template_path)
+        return (
+            source.st_mtime_ns,
+            source.st_size,
+            template.st_mtime_ns,
+            template.st_size,
+        )
+
+    def render(self, md_path):
+        stamp = self.stamp(md_path)
+        with self.lock:
+            entry = self.pages.get(md_path)
+            if entry is not None and entry[0] == stamp:
+                self.pages.move_to_end(md_path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with open(md_path, "r", encoding="utf-8") as file:
+            markdown = file.read()
+        template = load_template(self.template_path, self.basepath)
+        html = template.render(
+            Title=extract_title(markdown),
+            Content=markdown_to_page_node(markdown).to_html(),
+        )
+
+        with self.lock:
+            self.pages[md_path] = (stamp, html)
+            self.pages.move_to_end(md_path)
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        return html
+
+    def summary(self):
+        return (
+            f"Preview cache: {self.hits} hits, {self.misses} misses, "
+            f"{len(self.pages)} pages held"
+        )
+
+
+class LazyPreviewHandler(LiveReloadHandler):
+    def __init__(self, *args, renderer=None, **kwargs):
+        self.renderer = renderer
+        super().__init__(*args, basepath=renderer.basepath, **kwargs)
+
+    def do_GET(self):
+        if self.notifier is not None and self.path == RELOAD_PATH:
+            return self.stream_reload_events()
+        md_path, redirect = self.renderer.resolve(self.path)
+        if redirect is not None:
+            self.send_response(301)
+            self.send_header("Location", redirect)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if md_path is None:
+            return super().do_GET()
+
+        try:
+            html = self.renderer.render(md_path)
+        except Exception as error:
+            # The reason phrase goes into the status line, which must be
+            # latin-1; the details are escaped into the body instead.
+            self.send_error(
+                500,
+                "Page failed to render",
+                f"{md_path}: {type(error).__name__}: {error}",
+            )
+            return
+        if self.notifier is not None:
+            html = inject_reload_script(html)
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
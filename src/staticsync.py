@@ -0,0 +1,130 @@
+import errno
+import os
+import shutil
+from pathlib import Path
+
+from manifest import hash_file
+from writer import temp_path_for
+
+LINK_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request number for FICLONE on Linux (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+
+def sync_static(src_dir, dest_dir, previous=(), checksum=False, link="copy"):
+    if link not in LINK_MODES:
+        raise ValueError(f"invalid link mode: {link}")
+    src_dir = Path(src_dir)
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    stats = {"copied": 0, "unchanged": 0, "removed": 0}
+    files = []
+    for rel_path in walk_files(src_dir):
+        files.append(rel_path)
+        src_path = src_dir / rel_path
+        dest_path = dest_dir / rel_path
+        if is_up_to_date(src_path, dest_path, checksum):
+            stats["unchanged"] += 1
+            continue
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        place_file(src_path, dest_path, link)
+        stats["copied"] += 1
+
+    current = set(files)
+    for rel_path in sorted(set(previous) - current):
+        dest_path = dest_dir / rel_path
+        if dest_path.is_file():
+            dest_path.unlink()
+            remove_empty_parents(dest_path, dest_dir)
+            stats["removed"] += 1
+
+    print(
+        f"Static files: copied {stats['copied']}, unchanged {stats['unchanged']}, "
+        f"removed {stats['removed']}"
+    )
+    return files, stats
+
+
+def walk_files(root):
+    stack = [Path(root)]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file():
+                    yield Path(entry.path).relative_to(root).as_posix()
+
+
+def is_up_to_date(src_path, dest_path, checksum=False):
+    try:
+        dest_stat = dest_path.stat()
+    except FileNotFoundError:
+        return False
+    src_stat = src_path.stat()
+    if (src_stat.st_dev, src_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return not checksum or hash_file(src_path) == hash_file(dest_path)
+    if checksum and hash_file(src_path) == hash_file(dest_path):
+        # Same bytes, different mtime: line the mtimes up so the next
+        # build can take the cheap stat comparison again.
+        os.utime(dest_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        return True
+    return False
+
+
+def place_file(src_path, dest_path, link="copy"):
+    # Build the new file next to the destination and rename it into place,
+    # so the destination is never missing or half-written.
+    tmp_path = temp_path_for(dest_path)
+    try:
+        link_or_copy(src_path, tmp_path, link)
+        os.replace(tmp_path, dest_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def link_or_copy(src_path, dest_path, link):
+    if link == "hardlink":
+        try:
+            os.link(src_path, dest_path)
+            return
+        except OSError as error:
+            if error.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+    elif link == "reflink" and reflink(src_path, dest_path):
+        return
+    shutil.copy2(src_path, dest_path)
+
+
+def reflink(src_path, dest_path):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+        try:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+        except OSError:
+            cloned = False
+        else:
+            cloned = True
+    if not cloned:
+        dest_path.unlink()
+        return False
+    shutil.copystat(src_path, dest_path)
+    return True
+
+
+def remove_empty_parents(path, stop):
+    parent = path.parent
+    while parent != stop and parent.is_dir() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
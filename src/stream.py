@@ -0,0 +1,93 @@
+import contextlib
+import mmap
+import os
+import re
+
+from artifacts import INDEX_TEXT_LIMIT, node_text
+from convert import block_to_html_node, iter_blocks
+from deps import add_block_references
+from template import load_template
+from writer import write_atomic
+
+# Sources at least this large are converted block by block from a memory
+# map instead of being read, parsed and rendered as a whole.
+STREAM_THRESHOLD = 16 * 1024 * 1024
+
+TITLE_LINE_RE = re.compile(rb"^[^\S\n]*# ([^\n]*)", re.MULTILINE)
+
+
+def should_stream(path, threshold=None):
+    if threshold is None:
+        threshold = STREAM_THRESHOLD
+    return os.path.getsize(path) >= threshold
+
+
+@contextlib.contextmanager
+def map_source(path):
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # mmap refuses empty files
+            yield b""
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def iter_source_blocks(source):
+    for _, block in iter_blocks(source):
+        yield block.decode("utf-8")
+
+
+def extract_mapped_title(source):
+    # Same rule as convert.extract_title, without decoding the whole file.
+    for match in TITLE_LINE_RE.finditer(source):
+        title = match.group(1).strip()
+        if title:
+            return title.decode("utf-8")
+    raise Exception("No h1 title found")
+
+
+def iter_html_chunks(source, texts=None, refs=None):
+    # The streamed equivalent of markdown_to_html_node(...).iter_html():
+    # only one block and its HTML are alive at a time. Each block's plain
+    # text is appended to texts, up to INDEX_TEXT_LIMIT in total, and the
+    # paths it references are added to the refs set.
+    yield "<div>"
+    empty = True
+    remaining = INDEX_TEXT_LIMIT
+    for block in iter_source_blocks(source):
+        empty = False
+        if refs is not None:
+            add_block_references(block, refs)
+        node = block_to_html_node(block)
+        if texts is not None and remaining > 0:
+            text = node_text(node, remaining)
+            texts.append(text)
+            remaining -= len(text) + 1
+        yield node.to_html()
+    if empty:
+        yield block_to_html_node("").to_html()
+    yield "</div>"
+
+
+def generate_page_streamed(
+    from_path, template_path, dest_path, basepath, with_text=False, make_dirs=True
+):
+    # Returns (written, text, title, refs), like main.generate_page.
+    template = load_template(template_path, basepath)
+    texts = [] if with_text else None
+    refs = set()
+    with map_source(from_path) as source:
+        title = extract_mapped_title(source)
+        if make_dirs:
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+        written = write_atomic(
+            dest_path,
+            lambda file: template.write(
+                file, Title=title, Content=iter_html_chunks(source, texts, refs)
+            ),
+        )
+    text = None
+    if with_text:
+        text = " ".join(text for text in texts if text)[:INDEX_TEXT_LIMIT]
+    return written, text, title, sorted(refs)
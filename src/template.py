@@ -0,0 +1,85 @@
+import os
+import re
+
+PLACEHOLDER_RE = re.compile(r"\{\{ (\w+) \}\}")
+ROOT_URL_RE = re.compile(r'(href|src)="/')
+
+_cache = {}
+
+
+def rewrite_urls(html, basepath):
+    if basepath == "/":
+        return html
+    return ROOT_URL_RE.sub(lambda match: f'{match.group(1)}="{basepath}', html)
+
+
+class Template:
+    def __init__(self, text, basepath="/"):
+        self.basepath = basepath
+        self.parts = []
+        self.slots = []
+
+        text = rewrite_urls(text, basepath)
+        last_index = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            if match.start() > last_index:
+                self.parts.append(text[last_index : match.start()])
+            self.slots.append((len(self.parts), match.group(1), match.group(0)))
+            self.parts.append(None)
+            last_index = match.end()
+        if last_index < len(text):
+            self.parts.append(text[last_index:])
+        names = [name for _, name, _ in self.slots]
+        self.repeated = {name for name in names if names.count(name) > 1}
+
+    @classmethod
+    def load(cls, path, basepath="/"):
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(file.read(), basepath)
+
+    def render(self, **values):
+        parts = self.parts.copy()
+        for index, name, literal in self.slots:
+            if name in values:
+                parts[index] = rewrite_urls(values[name], self.basepath)
+            else:
+                parts[index] = literal
+        return "".join(parts)
+
+    def write(self, sink, **values):
+        # Like render(), but slot values may also be iterables of chunks
+        # (e.g. HTMLNode.iter_html()) which are streamed into the sink. An
+        # iterable filling a slot used more than once is joined first, as
+        # it can only be consumed once.
+        write = sink.write
+        for name in self.repeated:
+            value = values.get(name)
+            if value is not None and not isinstance(value, str):
+                values[name] = "".join(value)
+        slots = {index: (name, literal) for index, name, literal in self.slots}
+        for index, part in enumerate(self.parts):
+            if part is not None:
+                write(part)
+                continue
+            name, literal = slots[index]
+            value = values.get(name, literal)
+            if isinstance(value, str):
+                write(rewrite_urls(value, self.basepath))
+                continue
+            for chunk in value:
+                write(rewrite_urls(chunk, self.basepath))
+
+    def __repr__(self):
+        names = [name for _, name, _ in self.slots]
+        return f"Template({names}, {self.basepath})"
+
+
+def load_template(path, basepath="/"):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), basepath)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+    template = Template.load(path, basepath)
+    _cache[key] = ((stat.st_mtime_ns, stat.st_size), template)
+    return template
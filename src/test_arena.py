@@ -0,0 +1,126 @@
+import contextlib
+import io
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+import arena
+from arena import NodeArena, markdown_to_arena, markdown_to_page_node
+from artifacts import node_text
+from convert import markdown_to_html_node
+from corpus import make_document
+from main import generate_pages_recursive
+from manifest import BuildManifest
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+
+class TestNodeArena(unittest.TestCase):
+    def test_matches_tree(self):
+        for markdown in (
+            "",
+            "# Title",
+            "- one\n- `two` **three**",
+            "1. [link](/a)\n2. ![image](/b.png)",
+            make_document(200, random.Random(4)),
+        ):
+            with self.subTest(markdown=markdown[:20]):
+                self.assertEqual(
+                    markdown_to_arena(markdown).to_html(),
+                    markdown_to_html_node(markdown).to_html(),
+                )
+
+    def test_text_matches_tree(self):
+        markdown = make_document(200, random.Random(5))
+        tree = markdown_to_html_node(markdown)
+        flat = markdown_to_arena(markdown)
+        for limit in (10, 1000, 100_000):
+            with self.subTest(limit=limit):
+                self.assertEqual(node_text(flat, limit), node_text(tree, limit))
+
+    def test_long_documents_use_the_arena(self):
+        self.assertNotIsInstance(markdown_to_page_node("- a\n- b"), NodeArena)
+        previous = arena.ARENA_LINES
+        arena.ARENA_LINES = 1
+        self.addCleanup(setattr, arena, "ARENA_LINES", previous)
+        self.assertIsInstance(markdown_to_page_node("- a\n- b"), NodeArena)
+        self.assertNotIsInstance(markdown_to_page_node("- a"), NodeArena)
+
+    def test_build_output_matches_tree(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            content = root / "content"
+            (content / "wide").mkdir(parents=True)
+            (content / "index.md").write_text("# Home\n\n- [wide](/wide)")
+            (content / "wide/index.md").write_text(
+                make_document(100, random.Random(6))
+            )
+            template = root / "template.html"
+            template.write_text("<title>{{ Title }}</title>{{ Content }}")
+
+            def build(name, **options):
+                dest = root / name
+                with contextlib.redirect_stdout(io.StringIO()):
+                    generate_pages_recursive(
+                        content,
+                        dest,
+                        template,
+                        "/",
+                        BuildManifest(),
+                        site_url="https://example.com",
+                        search_index=True,
+                        **options,
+                    )
+                return {
+                    path.relative_to(dest).as_posix(): path.read_text()
+                    for path in sorted(dest.rglob("*"))
+                    if path.is_file()
+                }
+
+            expected = build("tree")
+            previous = arena.ARENA_LINES
+            arena.ARENA_LINES = 1
+            self.addCleanup(setattr, arena, "ARENA_LINES", previous)
+            self.assertEqual(build("arena"), expected)
+            self.assertEqual(build("piped", io_threads=2), expected)
+
+    def test_flat_layout(self):
+        arena = markdown_to_arena("- a\n- b")
+        self.assertEqual(len(arena), 6)
+        self.assertEqual(list(arena.ends), [6, 6, 4, 4, 6, 6])
+        self.assertEqual(arena.values, [None, None, None, "a", None, "b"])
+        self.assertEqual(arena.tag_names, [None, "div", "ul", "li"])
+
+    def test_add_node(self):
+        arena = NodeArena()
+        arena.add_node(
+            ParentNode(
+                "p",
+                [
+                    LeafNode("a", "docs", {"href": "/docs"}),
+                    ParentNode("b", [LeafNode(None, "bold")]),
+                ],
+            )
+        )
+        sink = io.StringIO()
+        arena.write_html(sink)
+        self.assertEqual(sink.getvalue(), '<p><a href="/docs">docs</a><b>bold</b></p>')
+
+    def test_invalid(self):
+        arena = NodeArena()
+        arena.open("ul")
+        with self.assertRaises(ValueError):
+            arena.to_html()
+        with self.assertRaises(ValueError):
+            arena.close()
+        with self.assertRaises(ValueError):
+            NodeArena().open(None)
+        arena = NodeArena()
+        arena.add("p", None)
+        with self.assertRaises(ValueError):
+            arena.to_html()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from artifacts import (
+    load_search_index,
+    node_text,
+    page_path,
+    render_feed,
+    render_sitemap,
+    summarize,
+)
+from convert import markdown_to_html_node
+
+
+class TestNodeText(unittest.TestCase):
+    def test_blocks_are_separated_and_inline_joined(self):
+        node = markdown_to_html_node(
+            "# Title\n\nSome **bold** and [a link](/x).\n\n- one\n- two"
+        )
+        self.assertEqual(node_text(node), "Title Some bold and a link. one two")
+
+    def test_limit(self):
+        node = markdown_to_html_node("word " * 100)
+        self.assertEqual(len(node_text(node, limit=12)), 12)
+
+
+class TestHelpers(unittest.TestCase):
+    def test_summarize(self):
+        self.assertEqual(summarize("short"), "short")
+        self.assertEqual(summarize("one two three", 9), "one two…")
+
+    def test_page_path(self):
+        self.assertEqual(page_path("/", "index.html"), "/")
+        self.assertEqual(page_path("/site/", "blog/tom/index.html"), "/site/blog/tom/")
+        self.assertEqual(page_path("/", "about.html"), "/about.html")
+
+    def test_sitemap_and_feed_escape(self):
+        sitemap = render_sitemap("https://example.com/", ["/", "/a&b/"])
+        self.assertIn("<loc>https://example.com/a&amp;b/</loc>", sitemap)
+        feed = render_feed(
+            "https://example.com", "/", "Home", [("/p/", "Fish & Chips", "<b>")]
+        )
+        self.assertIn("<title>Fish &amp; Chips</title>", feed)
+        self.assertIn("<link>https://example.com/p/</link>", feed)
+        self.assertIn("<description>&lt;b&gt;</description>", feed)
+
+    def test_load_search_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "search.json"
+            self.assertEqual(load_search_index(path), {})
+            path.write_text('[{"path": "/", "title": "Home", "text": "hi"}]')
+            self.assertEqual(load_search_index(path)["/"]["text"], "hi")
+            path.write_text("{broken")
+            self.assertEqual(load_search_index(path), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import gzip
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from compress import (
+    FORMATS,
+    Precompressor,
+    brotli,
+    compress_file,
+    parse_formats,
+    remove_siblings,
+)
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        return path
+
+    def test_gzip_sibling_round_trips(self):
+        path = self.write("index.html", "<p>hello</p>" * 100)
+        written, stamp = compress_file(path, ["gzip"], level=6)
+        self.assertEqual(written, 1)
+        self.assertTrue(stamp.startswith("gzip-6:"))
+        sibling = self.root / "index.html.gz"
+        self.assertEqual(gzip.decompress(sibling.read_bytes()), path.read_bytes())
+
+    def test_stamp_decides_recompression(self):
+        path = self.write("index.html", "<p>hello</p>")
+        _, stamp = compress_file(path, ["gzip"])
+        self.assertEqual(compress_file(path, ["gzip"], stamp=stamp), (0, stamp))
+        # same size and mtime, other content
+        stat = path.stat()
+        path.write_text("<p>HELLO</p>")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        written, changed = compress_file(path, ["gzip"], stamp=stamp)
+        self.assertEqual(written, 1)
+        self.assertEqual(
+            gzip.decompress((self.root / "index.html.gz").read_bytes()),
+            b"<p>HELLO</p>",
+        )
+        self.assertEqual(compress_file(path, ["gzip"], 1, changed)[0], 1)
+        (self.root / "index.html.gz").unlink()
+        self.assertEqual(compress_file(path, ["gzip"], stamp=changed)[0], 1)
+
+    def test_dropped_format_siblings_are_removed(self):
+        path = self.write("index.html", "<p>hello</p>")
+        self.write("index.html.br", "made with --compress gzip,br")
+        self.assertEqual(compress_file(path, ["gzip"])[0], 1)
+        self.assertFalse((self.root / "index.html.br").exists())
+        self.assertEqual(remove_siblings(path), 1)
+        self.assertFalse((self.root / "index.html.gz").exists())
+        self.assertTrue(path.exists())
+
+    @unittest.skipUnless(brotli, "brotli is not installed")
+    def test_brotli(self):
+        path = self.write("index.css", "body { margin: 0 }")
+        compress_file(path, ["gzip", "br"])
+        self.assertEqual(
+            brotli.decompress((self.root / "index.css.br").read_bytes()),
+            path.read_bytes(),
+        )
+
+    def test_parse_formats(self):
+        self.assertEqual(parse_formats("gzip, gzip"), ["gzip"])
+        with self.assertRaises(ValueError):
+            parse_formats("zstd")
+        if "br" not in FORMATS:
+            with self.assertRaises(ValueError):
+                parse_formats("gzip,br")
+
+    def test_precompressor_tree_and_orphans(self):
+        self.write("index.html", "home")
+        self.write("blog/post/index.html", "post")
+        self.write("images/tom.png", "png")
+        self.write("data.json.gz", "static file, not a sibling")
+        compressor = Precompressor(self.root, ["gzip"], threads=2)
+        self.assertTrue(compressor.settings_changed())
+        compressor.submit([self.root / "index.html"])
+        compressor.submit_tree((".html",))
+        self.assertEqual(compressor.wait(), 2)
+        self.assertTrue((self.root / "blog/post/index.html.gz").exists())
+        self.assertFalse((self.root / "images/tom.png.gz").exists())
+        stamps = compressor.stamps
+        self.assertEqual(sorted(stamps), ["blog/post/index.html", "index.html"])
+
+        again = Precompressor(self.root, ["gzip"], stamps=stamps)
+        self.assertFalse(again.settings_changed())
+        again.submit_tree((".html",))
+        self.assertEqual(again.wait(), 0)
+        relevel = Precompressor(self.root, ["gzip"], 5, stamps=stamps)
+        self.assertTrue(relevel.settings_changed())
+        relevel.wait()
+
+        (self.root / "blog/post/index.html").unlink()
+        removed = again.remove_orphans(keep=["data.json.gz"])
+        self.assertEqual(removed, 1)
+        self.assertEqual(list(again.stamps), ["index.html"])
+        self.assertFalse((self.root / "blog").exists())
+        self.assertTrue((self.root / "data.json.gz").exists())
+        self.assertTrue((self.root / "index.html.gz").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,16 @@
 import unittest
 
 from convert import (
+    INLINE_CACHE_MAX_CHARS,
     BlockType,
     block_to_block_type,
+    clear_inline_cache,
+    inline_cache_info,
+    iter_blocks,
     markdown_to_blocks,
     markdown_to_html_node,
     text_node_to_html_node,
+    text_to_children,
     text_to_textnodes,
 )
 from textnode import TextNode, TextType
@@ -103,6 +108,59 @@ class TestTextToTextNodes(unittest.TestCase):
         )
 
 
+class TestTextToChildren(unittest.TestCase):
+    def test_plain_text_is_one_leaf(self):
+        children = text_to_children("just some plain prose, nothing else.")
+        self.assertEqual(len(children), 1)
+        self.assertEqual(children[0].to_html(), "just some plain prose, nothing else.")
+
+    def test_matches_tokenizer(self):
+        for text in ("", "plain", "a **b** c", "a * lone star", "see ![x](y)"):
+            expected = [
+                text_node_to_html_node(node).to_html()
+                for node in text_to_textnodes(text)
+            ]
+            self.assertEqual(
+                [child.to_html() for child in text_to_children(text)], expected
+            )
+
+
+class TestInlineCache(unittest.TestCase):
+    def setUp(self):
+        clear_inline_cache()
+
+    def test_repeated_text_is_memoised(self):
+        first = text_to_children("a **repeated** item")
+        second = text_to_children("a **repeated** item")
+        self.assertIsNot(first, second)
+        self.assertIs(first[1], second[1])
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_plain_and_long_text_bypass_cache(self):
+        text_to_children("plain words")
+        text_to_children("**x** " * (INLINE_CACHE_MAX_CHARS // 6 + 1))
+        self.assertEqual(inline_cache_info().currsize, 0)
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                text_to_children("an **unclosed bold")
+        self.assertEqual(inline_cache_info().currsize, 0)
+
+
+class TestStrikethrough(unittest.TestCase):
+    def test_renders_s(self):
+        node = markdown_to_html_node("some ~~old~~ text and a ~ tilde")
+        self.assertEqual(
+            node.to_html(), "<div><p>some <s>old</s> text and a ~ tilde</p></div>"
+        )
+
+    def test_unclosed_is_text(self):
+        node = markdown_to_html_node("~~ not closed")
+        self.assertEqual(node.to_html(), "<div><p>~~ not closed</p></div>")
+
+
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
         md = """
@@ -139,6 +197,30 @@ This is the same paragraph on a new line
         blocks = markdown_to_blocks(md)
         self.assertEqual(blocks, ["Just a single block with no double newlines."])
 
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro"
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(blocks, ["Intro", "```\nfirst\n\n\nsecond\n```", "Outro"])
+
+    def test_extra_and_whitespace_only_blank_lines(self):
+        md = "one\n\n\n\ntwo\n   \nthree"
+        self.assertEqual(markdown_to_blocks(md), ["one", "two", "three"])
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_offsets_point_into_source(self):
+        md = "\n  # Title\n\nSome text\nmore\n\n- item\n"
+        blocks = list(iter_blocks(md))
+        self.assertEqual(
+            blocks, [(3, "# Title"), (12, "Some text\nmore"), (28, "- item")]
+        )
+        for offset, block in blocks:
+            self.assertTrue(md.startswith(block, offset))
+
+    def test_is_lazy(self):
+        blocks = iter_blocks("a\n\nb")
+        self.assertEqual(next(blocks), (0, "a"))
+
 
 class TestBlockToBlockType(unittest.TestCase):
     def test_heading(self):
@@ -164,6 +246,12 @@ class TestBlockToBlockType(unittest.TestCase):
             BlockType.QUOTE,
         )
 
+    def test_list_marker_needs_space_on_same_line(self):
+        for block in ("-\nfoo", "1.\nfoo", "- a\n-\nb"):
+            with self.subTest(block=block):
+                self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("-\ta"), BlockType.UNORDERED_LIST)
+
     def test_unordered_list(self):
         self.assertEqual(
             block_to_block_type("- item 1\n- item 2"),
@@ -186,8 +274,34 @@ class TestBlockToBlockType(unittest.TestCase):
             BlockType.PARAGRAPH,
         )
 
+    def test_unclosed_code_is_paragraph(self):
+        self.assertEqual(block_to_block_type("```\nno end"), BlockType.PARAGRAPH)
+
+    def test_mixed_lines_are_paragraph(self):
+        self.assertEqual(
+            block_to_block_type("> quote\nnot a quote"), BlockType.PARAGRAPH
+        )
+        self.assertEqual(block_to_block_type("1. one\n- two"), BlockType.PARAGRAPH)
+
+    def test_long_broken_blocks_do_not_backtrack(self):
+        # These took exponential time with the old unanchored patterns.
+        blocks = [
+            "> quoted  line\n" * 10000 + "not a quote",
+            "- list  item\n" * 10000 + "-broken",
+            "1. list  item\n" * 10000 + "2.broken",
+        ]
+        for block in blocks:
+            self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+
 
 class TestMarkdownToHTMLNode(unittest.TestCase):
+    def test_fenced_code_with_blank_lines(self):
+        md = "```\nline one\n\nline two\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html, "<div><pre><code>line one\n\nline two\n</code></pre></div>"
+        )
+
     def xtest_paragraphs(self):
         md = """
 This is **bolded** paragraph
@@ -0,0 +1,58 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from convert import markdown_to_html_node
+from corpus import generate_corpus, make_block, make_document, page_path, parse_mix
+from deps import page_references
+from main import extract_title
+
+
+class TestCorpus(unittest.TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("paragraph=3,code"), {"paragraph": 3, "code": 1})
+        with self.assertRaises(ValueError):
+            parse_mix("table=1")
+
+    def test_page_path_nesting(self):
+        self.assertEqual(
+            page_path(123, depth=2, fanout=10),
+            Path("section-3/section-2/page-123/index.md"),
+        )
+
+    def test_documents_render(self):
+        markdown = make_document(200, random.Random(1))
+        self.assertEqual(extract_title(markdown), "Benchmark document")
+        self.assertTrue(markdown_to_html_node(markdown).to_html().startswith("<div>"))
+
+    def test_lists_have_every_drawn_item(self):
+        for seed in range(20):
+            ulist = make_block("ulist", random.Random(seed), 0)
+            olist = make_block("olist", random.Random(seed), 0)
+            self.assertEqual(len(olist.split("\n")), len(ulist.split("\n")))
+            self.assertGreaterEqual(len(olist.split("\n")), 3)
+
+    def test_generate_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            info = generate_corpus(a, pages=5, blocks=10, seed=3)
+            generate_corpus(b, pages=5, blocks=10, seed=3)
+            pages_a = sorted(Path(a, "content").rglob("*.md"))
+            self.assertEqual(len(pages_a), 5)
+            self.assertEqual(
+                sum(len(path.read_text()) for path in pages_a), info["chars"]
+            )
+            for path in pages_a:
+                twin = Path(b) / path.relative_to(a)
+                self.assertEqual(path.read_text(), twin.read_text())
+            self.assertTrue(Path(a, "template.html").exists())
+            refs = set()
+            for path in pages_a:
+                refs.update(page_references(path.read_text()))
+            self.assertIn("images/image-0.png", refs)
+            for ref in refs:
+                self.assertTrue(Path(a, "static", ref).is_file(), ref)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+from deps import asset_stamp, changed_assets, local_path, page_dependencies
+
+
+class TestPageDependencies(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.content = root / "content"
+        self.static = root / "static"
+        (self.content / "blog/tom").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home")
+        (self.content / "blog/tom/index.md").write_text("# Tom")
+        (self.content / "contact.md").write_text("# Contact")
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "images/tom.png").write_bytes(b"png")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_resolves_assets_and_pages(self):
+        markdown = (
+            "![Tom](/images/tom.png) [Home](/) [Tom](/blog/tom) "
+            "[Contact](/contact) [Missing](/nowhere) [Ext](https://example.com) "
+            "[Relative](tom.png)"
+        )
+        assets, links = page_dependencies(markdown, self.content, self.static)
+        self.assertEqual(list(assets), ["images/tom.png"])
+        self.assertEqual(links, ["blog/tom/index.md", "contact.md", "index.md"])
+
+    def test_code_is_not_a_dependency(self):
+        markdown = (
+            "# Home\n\n```\n![Tom](/images/tom.png)\n```\n\n"
+            "Use `![Tom](/images/tom.png)` or `[Home](/)` here"
+        )
+        self.assertEqual(
+            page_dependencies(markdown, self.content, self.static), ({}, [])
+        )
+
+    def test_without_static_dir(self):
+        assets, links = page_dependencies("![Tom](/images/tom.png)", self.content)
+        self.assertEqual((assets, links), ({}, []))
+
+    def test_local_path(self):
+        self.assertEqual(local_path("/images/a%20b.png?v=1#x"), "images/a b.png")
+        self.assertIsNone(local_path("//cdn.example.com/a.png"))
+        self.assertIsNone(local_path("mailto:me@example.com"))
+
+    def test_changed_assets(self):
+        path = self.static / "images/tom.png"
+        assets = {"images/tom.png": asset_stamp(path), "images/gone.png": "1:1"}
+        self.assertEqual(changed_assets(assets, self.static), ["images/gone.png"])
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(changed_assets(assets, self.static), ["images/gone.png"])
+        self.assertEqual(assets["images/tom.png"][:2], [3, 0])
+        path.write_bytes(b"new png")
+        self.assertEqual(
+            changed_assets(assets, self.static),
+            ["images/gone.png", "images/tom.png"],
+        )
+
+    def test_unchanged_stat_is_not_rehashed(self):
+        path = self.static / "images/tom.png"
+        stamp = asset_stamp(path)
+        with mock.patch("deps.hash_file") as hash_file:
+            self.assertIs(asset_stamp(path, stamp), stamp)
+            self.assertEqual(changed_assets({"images/tom.png": stamp}, self.static), [])
+            hash_file.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 
 from htmlnode import HTMLNode
+from leafnode import LeafNode
+from parentnode import ParentNode
+from textnode import TextNode, TextType
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -21,5 +24,17 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(str(node), "HTMLNode(tag, value, None, {})")
 
 
+class TestSlots(unittest.TestCase):
+    def test_nodes_have_no_instance_dict(self):
+        for node in (
+            HTMLNode("p"),
+            LeafNode("b", "bold"),
+            ParentNode("p", [LeafNode(None, "text")]),
+            TextNode("text", TextType.TEXT),
+        ):
+            with self.subTest(node=type(node).__name__):
+                self.assertFalse(hasattr(node, "__dict__"))
+
+
 if __name__ == "__main__":
     unittest.main()
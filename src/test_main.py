@@ -0,0 +1,550 @@
+import contextlib
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import main
+from compress import Precompressor
+from convert import clear_inline_cache, markdown_to_html_node
+from main import BuildError, generate_pages_recursive
+from manifest import BuildManifest
+from pipeline import render_pages_pipelined
+from plan import case_insensitive
+from profiler import BuildProfiler
+from rendercache import RenderCache
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+class BuildTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        self.dest = self.root / "docs"
+        self.template = self.root / "template.html"
+        self.template.write_text(TEMPLATE)
+        self.write_page("index.md", "# Home\n\nWelcome")
+        self.write_page("blog/post/index.md", "# Post\n\nSome **bold** text")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write_page(self, rel_path, markdown):
+        path = self.content / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(markdown)
+
+    def build(
+        self,
+        manifest,
+        basepath="/",
+        jobs=1,
+        profiler=None,
+        cache=None,
+        io_threads=0,
+    ):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return generate_pages_recursive(
+                self.content,
+                self.dest,
+                self.template,
+                basepath,
+                manifest,
+                jobs,
+                profiler,
+                cache,
+                io_threads,
+            )
+
+    def read_outputs(self):
+        return {
+            path.relative_to(self.dest).as_posix(): path.read_text()
+            for path in sorted(self.dest.rglob("*.html"))
+        }
+
+
+class TestIncrementalBuild(BuildTestCase):
+    def test_first_build_renders_everything(self):
+        stats = self.build(BuildManifest())
+        self.assertEqual(stats["rendered"], 2)
+        self.assertIn(
+            "<b>bold</b>", (self.dest / "blog/post/index.html").read_text()
+        )
+
+    def test_unchanged_pages_are_skipped(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        stats = self.build(manifest)
+        self.assertEqual(stats["rendered"], 0)
+        self.assertEqual(stats["skipped"], 2)
+
+    def test_changed_source_is_rerendered(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        self.write_page("index.md", "# Home\n\nWelcome back")
+        stats = self.build(manifest)
+        self.assertEqual(stats["rendered"], 1)
+        self.assertIn("Welcome back", (self.dest / "index.html").read_text())
+
+    def test_template_or_basepath_change_rerenders_all(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build(manifest)["rendered"], 2)
+        self.assertEqual(self.build(manifest, "/site/")["rendered"], 2)
+
+    def test_missing_output_is_rerendered(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        (self.dest / "index.html").unlink()
+        self.assertEqual(self.build(manifest)["rendered"], 1)
+
+    def test_deleted_source_is_pruned(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        (self.content / "blog/post/index.md").unlink()
+        stats = self.build(manifest)
+        self.assertEqual(stats["pruned"], 1)
+        self.assertFalse((self.dest / "blog").exists())
+        self.assertTrue((self.dest / "index.html").exists())
+        self.assertNotIn("blog/post/index.md", manifest.pages)
+
+
+class TestOutputWrites(BuildTestCase):
+    def test_identical_output_is_left_untouched(self):
+        self.build(BuildManifest())
+        index = self.dest / "index.html"
+        os.utime(index, ns=(0, 1_000_000_000))
+        stats = self.build(BuildManifest())
+        self.assertEqual((stats["written"], stats["unchanged"]), (0, 2))
+        self.assertEqual(index.stat().st_mtime_ns, 1_000_000_000)
+
+    def test_changed_output_is_replaced(self):
+        self.build(BuildManifest())
+        self.write_page("index.md", "# Home\n\nChanged")
+        stats = self.build(BuildManifest())
+        self.assertEqual((stats["written"], stats["unchanged"]), (1, 1))
+        self.assertIn("Changed", (self.dest / "index.html").read_text())
+        self.assertEqual(list(self.dest.glob(".*.tmp")), [])
+
+    def test_failed_render_keeps_previous_output(self):
+        self.build(BuildManifest())
+        self.write_page("index.md", "# Home\n\nan **unclosed bold")
+        with self.assertRaises(BuildError):
+            self.build(BuildManifest())
+        self.assertIn("Welcome", (self.dest / "index.html").read_text())
+
+
+class TestParallelBuild(BuildTestCase):
+    def test_parallel_matches_serial(self):
+        for i in range(6):
+            self.write_page(f"notes/{i}/index.md", f"# Note {i}\n\n- item _{i}_")
+        self.build(BuildManifest())
+        serial = self.read_outputs()
+        stats = self.build(BuildManifest(), jobs=3)
+        self.assertEqual(stats["rendered"], 8)
+        self.assertEqual(self.read_outputs(), serial)
+
+    def test_failures_are_aggregated(self):
+        self.write_page("broken/index.md", "no title here")
+        self.write_page("worse/index.md", "still no title")
+        manifest = BuildManifest()
+        with self.assertRaises(BuildError) as ctx:
+            self.build(manifest, jobs=2)
+        self.assertEqual(len(ctx.exception.failures), 2)
+        self.assertIn("index.md", manifest.pages)
+        self.assertNotIn("broken/index.md", manifest.pages)
+        self.assertTrue((self.dest / "blog/post/index.html").exists())
+
+    def test_output_collisions_fail_the_build(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        manifest.static = ["blog/post/index.html"]
+        with self.assertRaises(BuildError) as ctx:
+            self.build(manifest)
+        self.assertEqual(len(ctx.exception.failures), 1)
+        self.assertIn("blog/post/index.md", manifest.pages)
+        self.assertTrue((self.dest / "blog/post/index.html").exists())
+
+    def test_new_page_never_breaks_a_built_one(self):
+        manifest = BuildManifest()
+        self.build(manifest)
+        self.write_page("Index.md", "# Shadow\n\nSame output, other case")
+        if case_insensitive(self.dest):
+            with self.assertRaises(BuildError) as ctx:
+                self.build(manifest)
+            [(md_path, _)] = ctx.exception.failures
+            self.assertEqual(md_path.name, "Index.md")
+        else:
+            self.build(manifest)
+            self.assertIn("Shadow", (self.dest / "Index.html").read_text())
+        self.assertIn("Welcome", (self.dest / "index.html").read_text())
+
+
+class TestPrecompressedBuild(BuildTestCase):
+    def compressed_build(self, manifest):
+        compressor = Precompressor(self.dest, ["gzip"], stamps=manifest.compressed)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(
+                    self.content,
+                    self.dest,
+                    self.template,
+                    "/",
+                    manifest,
+                    compressor=compressor,
+                )
+        finally:
+            written = compressor.wait()
+            manifest.compressed = compressor.stamps
+        return written
+
+    def test_written_pages_are_compressed_even_if_others_fail(self):
+        manifest = BuildManifest()
+        self.assertEqual(self.compressed_build(manifest), 2)
+        self.write_page("index.md", "# Home\n\nChanged")
+        self.write_page("broken/index.md", "no title here")
+        with self.assertRaises(BuildError):
+            self.compressed_build(manifest)
+        self.assertEqual(
+            gzip.decompress((self.dest / "index.html.gz").read_bytes()),
+            (self.dest / "index.html").read_bytes(),
+        )
+        self.assertEqual(
+            sorted(manifest.compressed), ["blog/post/index.html", "index.html"]
+        )
+
+
+    def test_uncompressed_rewrites_drop_siblings(self):
+        manifest = BuildManifest()
+        self.compressed_build(manifest)
+        (self.dest / "feed.xml.gz").write_bytes(b"old feed")
+        self.write_page("index.md", "# Home\n\nChanged")
+        os.remove(self.content / "blog/post/index.md")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.dest,
+                self.template,
+                "/",
+                manifest,
+                site_url="https://example.com",
+            )
+        self.assertEqual(list(self.dest.rglob("*.gz")), [])
+
+    def test_build_without_compress_drops_siblings(self):
+        static = self.root / "static"
+        static.mkdir()
+        manifest = BuildManifest()
+        with mock.patch.multiple(
+            main,
+            CONTENT_DIR=self.content,
+            DEST_DIR=self.dest,
+            STATIC_DIR=static,
+            TEMPLATE_PATH=self.template,
+        ), contextlib.redirect_stdout(io.StringIO()):
+            main.build(main.parse_args(["/", "--compress", "gzip"]), manifest)
+            self.assertTrue((self.dest / "index.html.gz").exists())
+            main.build(main.parse_args(["/"]), manifest)
+        self.assertEqual(list(self.dest.rglob("*.gz")), [])
+        self.assertEqual(manifest.compressed, {})
+
+
+class TestPipelinedBuild(BuildTestCase):
+    def test_pipelined_matches_serial(self):
+        for i in range(20):
+            self.write_page(f"notes/{i}/index.md", f"# Note {i}\n\n> quote **{i}**")
+        self.build(BuildManifest())
+        serial = self.read_outputs()
+        shutil.rmtree(self.dest)
+        stats = self.build(BuildManifest(), io_threads=3)
+        self.assertEqual((stats["rendered"], stats["written"]), (22, 22))
+        self.assertEqual(self.read_outputs(), serial)
+
+    def test_byte_bounded_queue(self):
+        self.build(BuildManifest())
+        serial = self.read_outputs()
+        shutil.rmtree(self.dest)
+        pages = [
+            (self.content / key, self.dest / key.replace(".md", ".html"))
+            for key in ("index.md", "blog/post/index.md")
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = render_pages_pipelined(
+                pages, self.template, "/", io_threads=2, queue_bytes=1
+            )
+        self.assertEqual([result[0] for result in results], [True, True])
+        self.assertEqual(self.read_outputs(), serial)
+
+    def test_byte_bounded_read_ahead(self):
+        # With a one-byte budget a page is only read once the one before
+        # it has been taken off the read queue.
+        events = []
+
+        def read_source(md_path, profiler):
+            events.append(("read", md_path.parent.name))
+            return md_path.read_text()
+
+        def convert(markdown):
+            events.append(("convert", markdown.split("\n")[0]))
+            return markdown_to_html_node(markdown)
+
+        pages = [
+            (self.content / key, self.dest / key.replace(".md", ".html"))
+            for key in ("index.md", "blog/post/index.md")
+        ]
+        with mock.patch("pipeline.read_source", read_source), mock.patch(
+            "pipeline.markdown_to_page_node", convert
+        ), contextlib.redirect_stdout(io.StringIO()):
+            render_pages_pipelined(
+                pages, self.template, "/", io_threads=2, queue_bytes=1
+            )
+        self.assertEqual(
+            events,
+            [
+                ("read", "content"),
+                ("convert", "# Home"),
+                ("read", "post"),
+                ("convert", "# Post"),
+            ],
+        )
+
+    def test_pipelined_failures_are_aggregated(self):
+        self.write_page("broken/index.md", "no title")
+        with self.assertRaises(BuildError) as ctx:
+            self.build(BuildManifest(), io_threads=2)
+        self.assertEqual(len(ctx.exception.failures), 1)
+        self.assertTrue((self.dest / "index.html").exists())
+
+
+class TestRenderCacheBuild(BuildTestCase):
+    def test_fresh_checkout_reuses_cached_pages(self):
+        cache = RenderCache(self.root / "cache")
+        self.build(BuildManifest(), cache=cache)
+        first = self.read_outputs()
+        self.assertEqual(cache.stores, 2)
+
+        shutil.rmtree(self.dest)
+        stats = self.build(BuildManifest(), cache=cache)
+        self.assertEqual((stats["cached"], stats["rendered"]), (2, 0))
+        self.assertEqual(self.read_outputs(), first)
+
+    def test_artifact_builds_reuse_cached_pages(self):
+        cache = RenderCache(self.root / "cache")
+
+        def build():
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = generate_pages_recursive(
+                    self.content,
+                    self.dest,
+                    self.template,
+                    "/",
+                    BuildManifest(),
+                    cache=cache,
+                    site_url="https://example.com",
+                    search_index=True,
+                )
+            outputs = {
+                path.relative_to(self.dest).as_posix(): path.read_text()
+                for path in sorted(self.dest.rglob("*"))
+                if path.is_file()
+            }
+            return stats, outputs
+
+        # Entries stored without their text are rendered again
+        self.build(BuildManifest(), cache=cache)
+        shutil.rmtree(self.dest)
+        stats, first = build()
+        self.assertEqual((stats["cached"], stats["rendered"]), (0, 2))
+        self.assertIn("search.json", first)
+
+        shutil.rmtree(self.dest)
+        stats, outputs = build()
+        self.assertEqual((stats["cached"], stats["rendered"]), (2, 0))
+        self.assertEqual(outputs, first)
+
+    def test_changed_basepath_misses(self):
+        cache = RenderCache(self.root / "cache")
+        self.build(BuildManifest(), cache=cache)
+        stats = self.build(BuildManifest(), basepath="/site/", cache=cache)
+        self.assertEqual(stats["rendered"], 2)
+
+
+class TestProfiledBuild(BuildTestCase):
+    def test_profiled_output_matches(self):
+        self.build(BuildManifest())
+        plain = self.read_outputs()
+        for options in ({"jobs": 1}, {"jobs": 2}, {"io_threads": 2}):
+            profiler = BuildProfiler()
+            self.build(BuildManifest(), profiler=profiler, **options)
+            self.assertEqual(self.read_outputs(), plain)
+            stages = profiler.stage_totals()
+            for stage in ("hash", "read", "convert", "inline", "to_html", "write"):
+                self.assertIn(stage, stages)
+            self.assertEqual(len(profiler.page_totals()), 2)
+
+    def test_inline_stage_includes_memo_hits(self):
+        # Every inline fragment is now in the memo or markup-free
+        self.build(BuildManifest())
+        for io_threads in (0, 2):
+            profiler = BuildProfiler()
+            self.build(BuildManifest(), profiler=profiler, io_threads=io_threads)
+            calls = sum(
+                event.get("calls", 0)
+                for event in profiler.events
+                if event["name"] == "inline"
+            )
+            # Home, Welcome, Post and the bold paragraph
+            self.assertEqual(calls, 4)
+
+
+class TestInlineCacheStats(BuildTestCase):
+    def test_hits_are_counted_in_workers_too(self):
+        for index in range(4):
+            self.write_page(f"p{index}.md", f"# P{index}\n\n- a **shared** item")
+        for jobs in (1, 2):
+            clear_inline_cache()
+            stats = self.build(BuildManifest(), jobs=jobs)
+            self.assertEqual(stats["inline_hits"] + stats["inline_misses"], 5)
+            self.assertGreaterEqual(stats["inline_hits"], 2)
+
+
+class TestDependencyGraph(BuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = self.root / "static"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "images/tom.png").write_bytes(b"png")
+        self.write_page(
+            "blog/post/index.md", "# Post\n\n![Tom](/images/tom.png) [Home](/)"
+        )
+
+    def explain_build(self, manifest):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            stats = generate_pages_recursive(
+                self.content,
+                self.dest,
+                self.template,
+                "/",
+                manifest,
+                static_dir=self.static,
+                explain=True,
+            )
+        return stats, output.getvalue()
+
+    def test_records_assets_and_links(self):
+        manifest = BuildManifest()
+        self.explain_build(manifest)
+        entry = manifest.pages["blog/post/index.md"]
+        self.assertEqual(list(entry["assets"]), ["images/tom.png"])
+        self.assertEqual(entry["links"], ["index.md"])
+        self.assertEqual(
+            manifest.dependents(["images/tom.png"]), ["blog/post/index.md"]
+        )
+
+    def test_changed_asset_rebuilds_only_its_pages(self):
+        manifest = BuildManifest()
+        self.explain_build(manifest)
+        (self.static / "images/tom.png").write_bytes(b"new png")
+        stats, output = self.explain_build(manifest)
+        self.assertEqual((stats["rendered"], stats["skipped"]), (1, 1))
+        self.assertIn(
+            "Rebuilding blog/post/index.md: asset images/tom.png changed", output
+        )
+
+    def test_touched_asset_rebuilds_nothing(self):
+        manifest = BuildManifest()
+        self.explain_build(manifest)
+        os.utime(self.static / "images/tom.png", ns=(0, 0))
+        stats, _ = self.explain_build(manifest)
+        self.assertEqual((stats["rendered"], stats["skipped"]), (0, 2))
+
+    def test_explain_lists_reasons(self):
+        manifest = BuildManifest()
+        _, output = self.explain_build(manifest)
+        self.assertIn("Rebuilding index.md: no previous build, output missing", output)
+        self.write_page("index.md", "# Home\n\nWelcome back")
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        _, output = self.explain_build(manifest)
+        self.assertIn("Rebuilding index.md: source changed, template changed", output)
+        self.assertIn("Rebuilding blog/post/index.md: template changed", output)
+        _, output = self.explain_build(manifest)
+        self.assertNotIn("Rebuilding", output)
+
+
+class TestSiteArtifacts(BuildTestCase):
+    def artifact_build(self, manifest, jobs=1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return generate_pages_recursive(
+                self.content,
+                self.dest,
+                self.template,
+                "/site/",
+                manifest,
+                jobs,
+                site_url="https://example.com",
+                search_index=True,
+            )
+
+    def search_index(self):
+        return json.loads((self.dest / "search.json").read_text())
+
+    def test_writes_sitemap_feed_and_search_index(self):
+        self.artifact_build(BuildManifest())
+        sitemap = (self.dest / "sitemap.xml").read_text()
+        self.assertIn("<loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/site/blog/post/</loc>", sitemap)
+        feed = (self.dest / "feed.xml").read_text()
+        self.assertIn("<title>Home</title>", feed)
+        self.assertIn("<description>Post Some bold text</description>", feed)
+        self.assertEqual(
+            self.search_index(),
+            [
+                {"path": "/site/", "title": "Home", "text": "Home Welcome"},
+                {
+                    "path": "/site/blog/post/",
+                    "title": "Post",
+                    "text": "Post Some bold text",
+                },
+            ],
+        )
+
+    def test_incremental_build_reuses_entries(self):
+        manifest = BuildManifest()
+        self.artifact_build(manifest)
+        self.write_page("index.md", "# Home\n\nWelcome back")
+        stats = self.artifact_build(manifest)
+        self.assertEqual((stats["rendered"], stats["skipped"]), (1, 1))
+        texts = [entry["text"] for entry in self.search_index()]
+        self.assertEqual(texts, ["Home Welcome back", "Post Some bold text"])
+
+        (self.content / "blog/post/index.md").unlink()
+        self.artifact_build(manifest)
+        self.assertEqual([entry["path"] for entry in self.search_index()], ["/site/"])
+        self.assertNotIn("blog/post", (self.dest / "sitemap.xml").read_text())
+
+    def test_enabling_artifacts_renders_unindexed_pages(self):
+        manifest = BuildManifest()
+        self.build(manifest, "/site/")
+        stats = self.artifact_build(manifest)
+        self.assertEqual(stats["rendered"], 2)
+        self.assertEqual(len(self.search_index()), 2)
+
+    def test_parallel_matches_serial(self):
+        self.artifact_build(BuildManifest())
+        serial = self.search_index()
+        shutil.rmtree(self.dest)
+        self.artifact_build(BuildManifest(), jobs=2)
+        self.assertEqual(self.search_index(), serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
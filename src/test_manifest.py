@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from manifest import BuildManifest, hash_bytes, hash_file
+
+
+class TestHash(unittest.TestCase):
+    def test_hash_file_matches_bytes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "page.md"
+            path.write_bytes(b"# Hello")
+            self.assertEqual(hash_file(path), hash_bytes(b"# Hello"))
+
+
+class TestBuildManifest(unittest.TestCase):
+    def test_fresh_after_record(self):
+        manifest = BuildManifest()
+        manifest.record("index.md", "abc", "tpl", "/", "index.html")
+        self.assertTrue(manifest.is_fresh("index.md", "abc", "tpl", "/", "index.html"))
+
+    def test_not_fresh_when_inputs_change(self):
+        manifest = BuildManifest()
+        manifest.record("index.md", "abc", "tpl", "/", "index.html")
+        self.assertFalse(manifest.is_fresh("index.md", "xyz", "tpl", "/", "index.html"))
+        self.assertFalse(manifest.is_fresh("index.md", "abc", "new", "/", "index.html"))
+        self.assertFalse(
+            manifest.is_fresh("index.md", "abc", "tpl", "/site/", "index.html")
+        )
+        self.assertFalse(manifest.is_fresh("other.md", "abc", "tpl", "/", "index.html"))
+
+    def test_explain_lists_changed_inputs(self):
+        manifest = BuildManifest()
+        self.assertEqual(
+            manifest.explain("index.md", "abc", "tpl", "/", "index.html"),
+            ["no previous build"],
+        )
+        manifest.record("index.md", "abc", "tpl", "/", "index.html")
+        self.assertEqual(
+            manifest.explain("index.md", "xyz", "new", "/", "index.html"),
+            ["source changed", "template changed"],
+        )
+
+    def test_renderer_change_is_stale(self):
+        manifest = BuildManifest()
+        manifest.record("index.md", "abc", "tpl", "/", "index.html")
+        manifest.pages["index.md"]["renderer"] = "older sitegen"
+        self.assertEqual(
+            manifest.explain("index.md", "abc", "tpl", "/", "index.html"),
+            ["sitegen changed"],
+        )
+
+    def test_dependents(self):
+        manifest = BuildManifest()
+        manifest.record("a.md", "1", "tpl", "/", "a.html", {"images/a.png": "1:1"})
+        manifest.record("b.md", "2", "tpl", "/", "b.html")
+        self.assertEqual(manifest.dependents(["images/a.png"]), ["a.md"])
+        self.assertEqual(manifest.dependents(["images/b.png"]), [])
+
+    def test_stale_keys(self):
+        manifest = BuildManifest()
+        manifest.record("a.md", "1", "tpl", "/", "a.html")
+        manifest.record("b.md", "2", "tpl", "/", "b.html")
+        self.assertEqual(manifest.stale_keys({"a.md"}), ["b.md"])
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state" / "manifest.json"
+            manifest = BuildManifest()
+            manifest.record("index.md", "abc", "tpl", "/", "index.html")
+            manifest.save(path)
+            loaded = BuildManifest.load(path)
+            self.assertEqual(loaded.pages, manifest.pages)
+
+    def test_load_missing_or_corrupt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "manifest.json"
+            self.assertEqual(BuildManifest.load(path).pages, {})
+            path.write_text("{not json")
+            self.assertEqual(BuildManifest.load(path).pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
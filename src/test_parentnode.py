@@ -1,3 +1,5 @@
+import io
+import sys
 import unittest
 
 from leafnode import LeafNode
@@ -34,6 +36,38 @@ class TestTextNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             parent_node.to_html()
 
+    def test_iter_html_matches_to_html(self):
+        parent_node = ParentNode(
+            "ul",
+            [
+                ParentNode("li", [LeafNode(None, "one ")]),
+                ParentNode("li", [LeafNode("b", "two")]),
+            ],
+        )
+        self.assertEqual(
+            "".join(parent_node.iter_html()),
+            "<ul><li>one </li><li><b>two</b></li></ul>",
+        )
+
+    def test_write_html(self):
+        parent_node = ParentNode("p", [LeafNode(None, "a"), LeafNode("i", "b")])
+        sink = io.StringIO()
+        parent_node.write_html(sink)
+        self.assertEqual(sink.getvalue(), "<p>a<i>b</i></p>")
+
+    def test_deep_nesting_beyond_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 2
+        node = LeafNode(None, "x")
+        for _ in range(depth):
+            node = ParentNode("li", [node])
+        html = node.to_html()
+        self.assertEqual(len(html), depth * len("<li></li>") + 1)
+
+    def test_invalid_descendant_raises(self):
+        parent_node = ParentNode("div", [ParentNode("span", [])])
+        with self.assertRaises(ValueError):
+            parent_node.to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,11 +1,15 @@
 import unittest
 
 from parse import (
+    InlineRegistry,
+    InlineType,
+    delimited,
     extract_markdown_images,
     extract_markdown_links,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
+    tokenize_inline,
 )
 from textnode import TextNode, TextType
 
@@ -248,5 +252,94 @@ class TestExtract(unittest.TestCase):
         self.assertListEqual([("link", "url")], matches)
 
 
+class TestTokenizeInline(unittest.TestCase):
+    def test_mixed(self):
+        self.assertListEqual(
+            tokenize_inline("a **b** _c_ `d` ![e](f) [g](h) i"),
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode("b", TextType.BOLD),
+                TextNode(" ", TextType.TEXT),
+                TextNode("c", TextType.ITALIC),
+                TextNode(" ", TextType.TEXT),
+                TextNode("d", TextType.CODE),
+                TextNode(" ", TextType.TEXT),
+                TextNode("e", TextType.IMAGE, "f"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("g", TextType.LINK, "h"),
+                TextNode(" i", TextType.TEXT),
+            ],
+        )
+
+    def test_plain_and_empty(self):
+        self.assertListEqual(tokenize_inline("plain"), [TextNode("plain", TextType.TEXT)])
+        self.assertListEqual(tokenize_inline(""), [TextNode("", TextType.TEXT)])
+
+    def test_no_empty_text_nodes_at_edges(self):
+        self.assertListEqual(
+            tokenize_inline("**bold**"), [TextNode("bold", TextType.BOLD)]
+        )
+
+    def test_literal_special_characters(self):
+        self.assertListEqual(
+            tokenize_inline("2 * 3! [not a link] (x)"),
+            [TextNode("2 * 3! [not a link] (x)", TextType.TEXT)],
+        )
+
+    def test_code_span_is_literal(self):
+        self.assertListEqual(
+            tokenize_inline("`snake_case`"), [TextNode("snake_case", TextType.CODE)]
+        )
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            tokenize_inline("an **unclosed bold")
+        with self.assertRaises(ValueError):
+            tokenize_inline("an _unclosed italic")
+
+
+class TestInlineRegistry(unittest.TestCase):
+    def test_custom_rule(self):
+        footnote = InlineType("footnote", None)
+
+        def match_footnote(text, i):
+            if not text.startswith("[^", i):
+                return None
+            end = text.find("]", i)
+            return TextNode(text[i + 2 : end], footnote), end + 1
+
+        registry = InlineRegistry()
+        registry.register("[", match_footnote)
+        registry.register("=", delimited("==", TextType.BOLD, required=False))
+        self.assertListEqual(
+            registry.tokenize("see[^1] and ==this== x = y"),
+            [
+                TextNode("see", TextType.TEXT),
+                TextNode("1", footnote),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("this", TextType.BOLD),
+                TextNode(" x = y", TextType.TEXT),
+            ],
+        )
+
+    def test_rules_for_a_trigger_run_in_order(self):
+        registry = InlineRegistry()
+        registry.register("*", delimited("*", TextType.ITALIC))
+        registry.register("*", delimited("**", TextType.BOLD), first=True)
+        self.assertListEqual(
+            registry.tokenize("**a** *b*"),
+            [
+                TextNode("a", TextType.BOLD),
+                TextNode(" ", TextType.TEXT),
+                TextNode("b", TextType.ITALIC),
+            ],
+        )
+
+    def test_empty_registry_keeps_text(self):
+        self.assertListEqual(
+            InlineRegistry().tokenize("**a**"), [TextNode("**a**", TextType.TEXT)]
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,94 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from plan import (
+    Progress,
+    case_insensitive,
+    create_directories,
+    format_duration,
+    plan_pages,
+)
+
+
+class TestPlanPages(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        self.dest = self.root / "docs"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel_path):
+        path = self.content / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("# Title")
+
+    def test_pages_are_ordered_by_path(self):
+        for rel_path in ("index.md", "blog/b.md", "blog/a/index.md", "notes.txt"):
+            self.write(rel_path)
+        plan = plan_pages(self.content, self.dest)
+        self.assertEqual(
+            [key for key, _, _, _ in plan.pages],
+            ["blog/a/index.md", "blog/b.md", "index.md"],
+        )
+        key, md_path, html_path, output = plan.pages[1]
+        self.assertEqual(md_path, self.content / "blog/b.md")
+        self.assertEqual(html_path, self.dest / "blog/b.html")
+        self.assertEqual(output, "blog/b.html")
+        self.assertEqual(len(plan), 3)
+
+    def test_collisions(self):
+        self.write("about.md")
+        self.write("About.md")
+        self.write("index.md")
+        plan = plan_pages(self.content, self.dest, ["index.html"], fold_case=True)
+        self.assertEqual([key for key, _, _, _ in plan.pages], ["About.md"])
+        errors = {key: str(error) for key, _, error in plan.collisions}
+        self.assertIn("page About.md", errors["about.md"])
+        self.assertIn("static file index.html", errors["index.md"])
+
+    def test_known_page_keeps_its_output(self):
+        self.write("about.md")
+        self.write("About.md")
+        plan = plan_pages(self.content, self.dest, known=["about.md"], fold_case=True)
+        self.assertEqual([key for key, _, _, _ in plan.pages], ["about.md"])
+        self.assertEqual([key for key, _, _ in plan.collisions], ["About.md"])
+
+    def test_case_is_kept_on_case_sensitive_filesystems(self):
+        self.write("about.md")
+        self.write("About.md")
+        plan = plan_pages(self.content, self.dest, fold_case=False)
+        self.assertEqual(len(plan), 2)
+        self.assertEqual(plan.collisions, [])
+        self.assertIsInstance(case_insensitive(self.dest), bool)
+
+
+class TestCreateDirectories(unittest.TestCase):
+    def test_each_parent_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            paths = [root / "a/b/index.html", root / "a/b/other.html", root / "c.html"]
+            self.assertEqual(create_directories(paths), 2)
+            self.assertTrue((root / "a/b").is_dir())
+
+
+class TestProgress(unittest.TestCase):
+    def test_report(self):
+        progress = Progress(4, interval=3600, file=io.StringIO())
+        progress.advance(2)
+        self.assertEqual(progress.file.getvalue(), "")
+        report = progress.report(progress.start + 2)
+        self.assertEqual(report, "Progress: 2/4 pages (50%), 1 pages/s, ETA 2s")
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(4.6), "5s")
+        self.assertEqual(format_duration(65), "1m05s")
+        self.assertEqual(format_duration(3725), "1h02m05s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+from profiler import NULL_PROFILER, BuildProfiler
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_stage_records_event(self):
+        profiler = BuildProfiler()
+        with profiler.stage("read", "a.md"):
+            pass
+        (event,) = profiler.events
+        self.assertEqual(event["name"], "read")
+        self.assertEqual(event["page"], "a.md")
+        self.assertGreaterEqual(event["duration"], 0)
+
+    def test_instrument_accumulates_and_restores(self):
+        module = types.SimpleNamespace(work=lambda x: x * 2)
+        original = module.work
+        profiler = BuildProfiler()
+        with profiler.instrument(module, "work", "inline", "a.md"):
+            self.assertEqual(module.work(2), 4)
+            module.work(3)
+        self.assertIs(module.work, original)
+        (event,) = profiler.events
+        self.assertEqual(event["calls"], 2)
+        self.assertIsNone(event["start"])
+
+    def test_totals_and_summary(self):
+        profiler = BuildProfiler()
+        for page in ("slow.md", "fast.md"):
+            with profiler.stage("page", page):
+                with profiler.stage("convert", page):
+                    pass
+        self.assertEqual(profiler.stage_totals()["convert"]["count"], 2)
+        self.assertEqual(set(profiler.page_totals()), {"slow.md", "fast.md"})
+        summary = profiler.summary()
+        self.assertIn("convert", summary)
+        self.assertIn("Slowest 2 of 2 pages", summary)
+
+    def test_write_trace(self):
+        profiler = BuildProfiler()
+        with profiler.stage("page", "a.md"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "trace.json"
+            profiler.write_trace(path)
+            data = json.loads(path.read_text())
+        (event,) = data["traceEvents"]
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"]["page"], "a.md")
+
+    def test_null_profiler(self):
+        with NULL_PROFILER.stage("read"):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import inspect
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from convert import markdown_to_html_node
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from main import generate_page
+from parentnode import ParentNode
+from parse import tokenize_inline
+from pipeline import render_pages_pipelined
+from rendercache import RenderCache, render_key
+from stream import generate_page_streamed
+from template import load_template
+from textnode import TextNode
+from version import RENDER_MODULES
+from writer import write_atomic
+
+
+class TestRenderKey(unittest.TestCase):
+    def test_depends_on_every_input(self):
+        key = render_key("src", "tpl", "/")
+        self.assertEqual(key, render_key("src", "tpl", "/"))
+        self.assertNotEqual(key, render_key("src2", "tpl", "/"))
+        self.assertNotEqual(key, render_key("src", "tpl2", "/"))
+        self.assertNotEqual(key, render_key("src", "tpl", "/site/"))
+
+    def test_fingerprint_covers_page_renderers(self):
+        # Every module on a path that produces page output
+        for renderer in (
+            generate_page,
+            generate_page_streamed,
+            render_pages_pipelined,
+            markdown_to_html_node,
+            tokenize_inline,
+            load_template,
+            write_atomic,
+            HTMLNode,
+            LeafNode,
+            ParentNode,
+            TextNode,
+        ):
+            module = Path(inspect.getfile(renderer)).name
+            self.assertIn(module, RENDER_MODULES, renderer.__name__)
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.cache = RenderCache(self.root / "cache", max_bytes=25)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def page(self, name, text):
+        path = self.root / name
+        path.write_text(text)
+        return path
+
+    def test_miss_then_hit(self):
+        self.assertIsNone(self.cache.lookup("ab" * 32))
+        self.cache.store("ab" * 32, self.page("a.html", "<p>a</p>"))
+        self.assertEqual(self.cache.lookup("ab" * 32).read_text(), "<p>a</p>")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        for i, key in enumerate(("aa" * 32, "bb" * 32, "cc" * 32)):
+            self.cache.store(key, self.page(f"{i}.html", "x" * 10))
+            path = self.cache.path_for(key)
+            os.utime(path, ns=(0, (i + 1) * 1_000_000_000))
+        # touching the oldest entry makes it the most recently used
+        self.cache.lookup("aa" * 32)
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertTrue(self.cache.path_for("aa" * 32).exists())
+        self.assertFalse(self.cache.path_for("bb" * 32).exists())
+        self.assertTrue(self.cache.path_for("cc" * 32).exists())
+
+    def test_text_sidecar(self):
+        key = "ab" * 32
+        self.cache.store(key, self.page("a.html", "<p>a</p>"))
+        self.assertIsNone(self.cache.lookup(key, with_text=True))
+        self.assertIsNone(self.cache.load_text(key))
+        self.cache.store(key, self.page("a.html", "<p>a</p>"), "a")
+        self.assertEqual(self.cache.lookup(key, with_text=True).read_text(), "<p>a</p>")
+        self.assertEqual(self.cache.load_text(key), "a")
+
+    def test_evicts_text_with_its_page(self):
+        for i, key in enumerate(("aa" * 32, "bb" * 32)):
+            self.cache.store(key, self.page(f"{i}.html", "x" * 10), "y" * 5)
+            os.utime(self.cache.path_for(key), ns=(0, (i + 1) * 1_000_000_000))
+        # 15 bytes each, over the 25 byte limit together
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertFalse(self.cache.text_path_for("aa" * 32).exists())
+        self.assertEqual(self.cache.load_text("bb" * 32), "y" * 5)
+
+    def test_evict_empty(self):
+        self.assertEqual(self.cache.evict(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
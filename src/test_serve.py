@@ -0,0 +1,318 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.parse
+import urllib.request
+from functools import partial
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from main import generate_pages_recursive
+from manifest import BuildManifest
+from serve import (
+    RELOAD_SCRIPT,
+    LazyPreviewHandler,
+    LiveReloadHandler,
+    PageRenderer,
+    ReloadNotifier,
+    SiteWatcher,
+    inject_reload_script,
+    open_watch,
+    snapshot_tree,
+)
+
+
+class TestInjectReloadScript(unittest.TestCase):
+    def test_before_body_close(self):
+        self.assertEqual(
+            inject_reload_script("<body><p>x</p></body></html>"),
+            f"<body><p>x</p>{RELOAD_SCRIPT}</body></html>",
+        )
+
+    def test_without_body(self):
+        self.assertEqual(inject_reload_script("<p>x</p>"), "<p>x</p>" + RELOAD_SCRIPT)
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.content = root / "content"
+        self.static = root / "static"
+        self.dest = root / "docs"
+        self.template = root / "template.html"
+        self.static.mkdir()
+        self.template.write_text("<body>{{ Content }}</body>")
+        self.write(self.content / "index.md", "# Home\n\nhello")
+        self.write(self.content / "about/index.md", "# About\n\n![me](/me.png)")
+        self.write(self.static / "me.png", "png")
+        self.manifest = BuildManifest()
+        self.rebuilds = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.dest,
+                self.template,
+                "/",
+                self.manifest,
+                static_dir=self.static,
+            )
+        self.watcher = SiteWatcher(
+            self.content,
+            self.static,
+            self.template,
+            self.dest,
+            "/",
+            self.manifest,
+            lambda: self.rebuilds.append(True),
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path, text):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        existed = path.exists()
+        path.write_text(text)
+        if existed:
+            # make sure the change is visible even on coarse mtime filesystems
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+    def poll(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            changed = self.watcher.poll()
+        return changed, out.getvalue()
+
+    def test_no_changes(self):
+        self.assertEqual(self.poll()[0], False)
+        self.assertEqual(self.rebuilds, [])
+
+    def test_single_page_edit(self):
+        self.write(self.content / "about/index.md", "# About\n\nupdated")
+        changed, out = self.poll()
+        self.assertTrue(changed)
+        self.assertIn("Rebuilt 1 page(s)", out)
+        self.assertIn("updated", (self.dest / "about/index.html").read_text())
+        self.assertEqual(self.rebuilds, [True])
+
+    def test_removed_page_is_pruned(self):
+        (self.content / "about/index.md").unlink()
+        self.poll()
+        self.assertFalse((self.dest / "about").exists())
+        self.assertNotIn("about/index.md", self.manifest.pages)
+
+    def test_template_change_rebuilds_all(self):
+        self.write(self.template, "<body><main>{{ Content }}</main></body>")
+        _, out = self.poll()
+        self.assertIn("Rebuilt 2 page(s)", out)
+        self.assertIn("<main>", (self.dest / "index.html").read_text())
+
+    def test_static_change_is_synced(self):
+        self.write(self.static / "index.css", "body {}")
+        self.poll()
+        self.assertEqual((self.dest / "index.css").read_text(), "body {}")
+
+    def test_asset_change_rebuilds_dependent_pages(self):
+        self.write(self.static / "me.png", "new png")
+        _, out = self.poll()
+        self.assertIn("Rebuilt 1 page(s)", out)
+        self.assertEqual((self.dest / "me.png").read_text(), "new png")
+
+
+class TestSnapshotTree(unittest.TestCase):
+    def test_relative_posix_keys(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "blog/post").mkdir(parents=True)
+            (root / "blog/post/index.md").write_text("# Post")
+            (root / "index.md").write_text("# Home")
+            (root / "me.png").write_bytes(b"png")
+            self.assertEqual(
+                sorted(snapshot_tree(root, ".md")),
+                ["blog/post/index.md", "index.md"],
+            )
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+class TestInotifyWatch(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        self.template = self.root / "template.html"
+        self.template.write_text("{{ Content }}")
+        self.watch = open_watch([self.content], [self.template])
+        self.assertIsNotNone(self.watch)
+
+    def tearDown(self):
+        self.watch.close()
+        self._tmp.cleanup()
+
+    def test_changes_are_reported_once(self):
+        self.assertFalse(self.watch.changed())
+        (self.content / "blog/index.md").write_text("# Blog")
+        self.assertTrue(self.watch.changed())
+        self.assertFalse(self.watch.changed())
+
+    def test_new_directories_are_watched(self):
+        (self.content / "blog/post").mkdir()
+        self.assertTrue(self.watch.changed())
+        (self.content / "blog/post/index.md").write_text("# Post")
+        self.assertTrue(self.watch.changed())
+
+    def test_only_the_watched_file_counts(self):
+        (self.root / "notes.txt").write_text("not the template")
+        self.assertFalse(self.watch.changed())
+        self.template.write_text("<main>{{ Content }}</main>")
+        self.assertTrue(self.watch.changed())
+
+
+class QuietHandler(LiveReloadHandler):
+    def log_message(self, *args):
+        pass
+
+
+class TestLiveReloadHandler(unittest.TestCase):
+    def test_serves_html_with_reload_script(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, "index.html").write_text("<body>hi</body>")
+            Path(tmp, "index.css").write_text("body {}")
+            handler = partial(QuietHandler, directory=tmp, notifier=ReloadNotifier())
+            server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                base = f"http://127.0.0.1:{server.server_address[1]}"
+                with urllib.request.urlopen(base + "/") as response:
+                    self.assertIn(RELOAD_SCRIPT, response.read().decode())
+                with urllib.request.urlopen(base + "/index.css") as response:
+                    self.assertEqual(response.read(), b"body {}")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_strips_the_basepath(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, "blog").mkdir()
+            Path(tmp, "blog/index.html").write_text("<body>blog</body>")
+            handler = partial(
+                QuietHandler,
+                directory=tmp,
+                notifier=ReloadNotifier(),
+                basepath="/sitegen/",
+            )
+            server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                base = f"http://127.0.0.1:{server.server_address[1]}"
+                with urllib.request.urlopen(base + "/sitegen/blog/") as response:
+                    body = response.read().decode()
+                self.assertIn("blog", body)
+                self.assertIn(RELOAD_SCRIPT, body)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+class TestPageRenderer(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        self.template = self.root / "template.html"
+        self.template.write_text('<a href="/">{{ Title }}</a>{{ Content }}')
+        for rel_path, title in (
+            ("index.md", "Home"),
+            ("blog/tom/index.md", "Tom"),
+            ("about.md", "About"),
+        ):
+            path = self.content / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"# {title}\n\ntext")
+        self.renderer = PageRenderer(self.content, self.template, "/site/", 2)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_resolve(self):
+        resolve = self.renderer.resolve
+        self.assertEqual(resolve("/site/"), (self.content / "index.md", None))
+        self.assertEqual(
+            resolve("/site/blog/tom/?x=1"), (self.content / "blog/tom/index.md", None)
+        )
+        self.assertEqual(resolve("/site/about.html"), (self.content / "about.md", None))
+        self.assertEqual(resolve("/site/blog/tom"), (None, "/site/blog/tom/"))
+        self.assertEqual(resolve("/site/index.css"), (None, None))
+        self.assertEqual(resolve("/site/../template.html"), (None, None))
+        self.assertEqual(resolve("/other/"), (None, None))
+
+    def test_render_is_cached_until_source_changes(self):
+        md_path = self.content / "index.md"
+        html = self.renderer.render(md_path)
+        self.assertEqual(
+            html, '<a href="/site/">Home</a><div><h1>Home</h1><p>text</p></div>'
+        )
+        self.assertIs(self.renderer.render(md_path), html)
+        self.assertEqual((self.renderer.hits, self.renderer.misses), (1, 1))
+
+        md_path.write_text("# Home\n\nchanged text")
+        stat = md_path.stat()
+        os.utime(md_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+        self.assertIn("changed text", self.renderer.render(md_path))
+
+    def test_lru_is_bounded(self):
+        for rel_path in ("index.md", "blog/tom/index.md", "about.md"):
+            self.renderer.render(self.content / rel_path)
+        self.assertEqual(
+            list(self.renderer.pages),
+            [self.content / "blog/tom/index.md", self.content / "about.md"],
+        )
+
+    def test_serves_pages_and_static(self):
+        static = self.root / "static"
+        static.mkdir()
+        (static / "index.css").write_text("body {}")
+
+        class QuietPreviewHandler(LazyPreviewHandler):
+            def log_message(self, *args):
+                pass
+
+        handler = partial(
+            QuietPreviewHandler, directory=str(static), renderer=self.renderer
+        )
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(base + "/site/blog/tom") as response:
+                self.assertEqual(response.url, base + "/site/blog/tom/")
+                self.assertIn("<p>text</p>", response.read().decode())
+            with urllib.request.urlopen(base + "/site/index.css") as response:
+                self.assertEqual(response.read(), b"body {}")
+            self.assertFalse((self.root / "docs").exists())
+
+            (self.content / "naïve—draft.md").write_text("no title — yet")
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(
+                    base + "/site/" + urllib.parse.quote("naïve—draft.html")
+                )
+            self.assertEqual(ctx.exception.code, 500)
+            body = ctx.exception.read().decode()
+            ctx.exception.close()
+            self.assertIn("naïve—draft.md: Exception: No h1 title found", body)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from staticsync import is_up_to_date, sync_static
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.src = root / "static"
+        self.dest = root / "docs"
+        (self.src / "images").mkdir(parents=True)
+        (self.src / "index.css").write_text("body {}")
+        (self.src / "images" / "logo.png").write_bytes(b"\x89PNG")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def sync(self, previous=(), **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sync_static(self.src, self.dest, previous, **kwargs)
+
+    def test_initial_copy(self):
+        files, stats = self.sync()
+        self.assertEqual(sorted(files), ["images/logo.png", "index.css"])
+        self.assertEqual(stats["copied"], 2)
+        self.assertEqual((self.dest / "index.css").read_text(), "body {}")
+
+    def test_second_sync_copies_nothing(self):
+        files, _ = self.sync()
+        _, stats = self.sync(files)
+        self.assertEqual(stats, {"copied": 0, "unchanged": 2, "removed": 0})
+
+    def test_changed_file_is_copied(self):
+        files, _ = self.sync()
+        (self.src / "index.css").write_text("body { color: red }")
+        _, stats = self.sync(files)
+        self.assertEqual(stats["copied"], 1)
+        self.assertIn("red", (self.dest / "index.css").read_text())
+
+    def test_stale_files_removed_but_pages_kept(self):
+        files, _ = self.sync()
+        (self.dest / "index.html").write_text("<p>page</p>")
+        (self.src / "images" / "logo.png").unlink()
+        _, stats = self.sync(files)
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse((self.dest / "images").exists())
+        self.assertTrue((self.dest / "index.html").exists())
+
+    def test_checksum_detects_same_size_change(self):
+        files, _ = self.sync()
+        src_css = self.src / "index.css"
+        stat = src_css.stat()
+        src_css.write_text("html {}")
+        os.utime(src_css, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertTrue(is_up_to_date(src_css, self.dest / "index.css"))
+        _, stats = self.sync(files, checksum=True)
+        self.assertEqual(stats["copied"], 1)
+
+    def test_hardlink(self):
+        self.sync(link="hardlink")
+        self.assertTrue(
+            os.path.samefile(self.src / "index.css", self.dest / "index.css")
+        )
+
+    def test_reflink_falls_back_to_copy(self):
+        _, stats = self.sync(link="reflink")
+        self.assertEqual(stats["copied"], 2)
+        self.assertEqual((self.dest / "index.css").read_text(), "body {}")
+
+    def test_invalid_link_mode(self):
+        with self.assertRaises(ValueError):
+            self.sync(link="symlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import contextlib
+import io
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+import stream
+from artifacts import node_text
+from convert import iter_blocks, markdown_to_html_node
+from corpus import make_document
+from deps import page_references
+from main import generate_page, generate_pages_recursive
+from manifest import BuildManifest
+from profiler import BuildProfiler
+from stream import (
+    extract_mapped_title,
+    generate_page_streamed,
+    map_source,
+    should_stream,
+)
+
+TEMPLATE = '<title>{{ Title }}</title><a href="/">home</a><main>{{ Content }}</main>'
+
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.template = self.root / "template.html"
+        self.template.write_text(TEMPLATE)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, name, markdown):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(markdown, encoding="utf-8")
+        return path
+
+    def test_iter_blocks_on_bytes_matches_str(self):
+        markdown = make_document(200, random.Random(1)) + "\n\n```\n\ncode é\n```"
+        from_bytes = [
+            (offset, block.decode()) for offset, block in iter_blocks(markdown.encode())
+        ]
+        self.assertEqual(from_bytes, list(iter_blocks(markdown)))
+
+    def test_streamed_output_matches(self):
+        markdown = make_document(300, random.Random(2), title="Big é page")
+        md_path = self.write("big.md", markdown)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(md_path, self.template, self.root / "tree.html", "/site/")
+        generate_page_streamed(
+            md_path, self.template, self.root / "stream.html", "/site/"
+        )
+        self.assertEqual(
+            (self.root / "stream.html").read_text(),
+            (self.root / "tree.html").read_text(),
+        )
+        written, text, title, refs = generate_page_streamed(
+            md_path, self.template, self.root / "stream.html", "/site/", True
+        )
+        self.assertFalse(written)
+        self.assertEqual(text, node_text(markdown_to_html_node(markdown)))
+        self.assertEqual(title, "Big é page")
+        self.assertEqual(refs, page_references(markdown))
+
+    def test_title(self):
+        md_path = self.write("title.md", "intro\n\n#  \n\n  # The Title  \n")
+        with map_source(md_path) as source:
+            self.assertEqual(extract_mapped_title(source), "The Title")
+        empty = self.write("empty.md", "")
+        with map_source(empty) as source:
+            with self.assertRaises(Exception):
+                extract_mapped_title(source)
+
+    def test_build_streams_large_pages(self):
+        content = self.root / "content"
+        self.write("content/index.md", "# Home\n\n![img](/images/a.png)")
+        self.write("content/big/index.md", make_document(50, random.Random(3)))
+        (self.root / "static/images").mkdir(parents=True)
+        (self.root / "static/images/a.png").write_bytes(b"png")
+
+        def build(dest, manifest, io_threads=0):
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(
+                    content,
+                    dest,
+                    self.template,
+                    "/",
+                    manifest,
+                    io_threads=io_threads,
+                    static_dir=self.root / "static",
+                )
+            return {
+                path.relative_to(dest).as_posix(): path.read_text()
+                for path in sorted(dest.rglob("*.html"))
+            }
+
+        expected = build(self.root / "tree", BuildManifest())
+        previous = stream.STREAM_THRESHOLD
+        stream.STREAM_THRESHOLD = 1
+        self.addCleanup(setattr, stream, "STREAM_THRESHOLD", previous)
+        self.assertTrue(should_stream(content / "index.md"))
+        manifest = BuildManifest()
+        self.assertEqual(build(self.root / "streamed", manifest), expected)
+        self.assertEqual(list(manifest.pages["index.md"]["assets"]), ["images/a.png"])
+        piped = build(self.root / "piped", BuildManifest(), io_threads=2)
+        self.assertEqual(piped, expected)
+
+    def test_streamed_pages_are_profiled(self):
+        content = self.root / "content"
+        self.write("content/index.md", "# Home")
+        self.write("content/big/index.md", make_document(50, random.Random(3)))
+        previous = stream.STREAM_THRESHOLD
+        stream.STREAM_THRESHOLD = 1
+        self.addCleanup(setattr, stream, "STREAM_THRESHOLD", previous)
+        for io_threads in (0, 2):
+            profiler = BuildProfiler()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(
+                    content,
+                    self.root / f"profiled-{io_threads}",
+                    self.template,
+                    "/",
+                    BuildManifest(),
+                    io_threads=io_threads,
+                    profiler=profiler,
+                )
+            self.assertEqual(profiler.stage_totals()["stream"]["count"], 2)
+            self.assertEqual(
+                sorted(profiler.page_totals()),
+                [str(content / "big/index.md"), str(content / "index.md")],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
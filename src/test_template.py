@@ -0,0 +1,75 @@
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from template import Template, load_template, rewrite_urls
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>x</p>"),
+            "<title>Hi</title><main><p>x</p></main>",
+        )
+
+    def test_compiled_parts(self):
+        template = Template("a{{ Title }}b{{ Content }}")
+        self.assertEqual(template.parts, ["a", None, "b", None])
+        self.assertEqual(
+            [name for _, name, _ in template.slots], ["Title", "Content"]
+        )
+
+    def test_repeated_and_unknown_placeholders(self):
+        template = Template("{{ Title }}|{{ Title }}|{{ Other }}")
+        self.assertEqual(template.render(Title="T"), "T|T|{{ Other }}")
+
+    def test_basepath_rewritten_in_template_and_values(self):
+        template = Template('<link href="/index.css" />{{ Content }}', "/site/")
+        self.assertEqual(template.parts[0], '<link href="/site/index.css" />')
+        self.assertEqual(
+            template.render(Content='<img src="/a.png"/><a href="/b">b</a>'),
+            '<link href="/site/index.css" /><img src="/site/a.png"/><a href="/site/b">b</a>',
+        )
+
+    def test_rewrite_urls_leaves_relative_urls(self):
+        self.assertEqual(
+            rewrite_urls('<a href="b">b</a><a href="https://x">x</a>', "/site/"),
+            '<a href="b">b</a><a href="https://x">x</a>',
+        )
+
+    def test_write_streams_chunks(self):
+        template = Template('<a href="/">{{ Title }}</a>{{ Content }}', "/site/")
+        sink = io.StringIO()
+        template.write(sink, Title="T", Content=iter(["<p>", '<img src="/x"/>', "</p>"]))
+        self.assertEqual(
+            sink.getvalue(),
+            '<a href="/site/">T</a><p><img src="/site/x"/></p>',
+        )
+
+    def test_write_repeats_streamed_slot(self):
+        template = Template("{{ Content }}<hr>{{ Content }}")
+        sink = io.StringIO()
+        template.write(sink, Content=iter(["<p>", "x", "</p>"]))
+        self.assertEqual(sink.getvalue(), template.render(Content="<p>x</p>"))
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_cached_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "template.html"
+            path.write_text("{{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            self.assertIsNot(load_template(path, "/site/"), first)
+
+            path.write_text("<main>{{ Content }}</main>")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            self.assertEqual(load_template(path).render(Content="x"), "<main>x</main>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from writer import copy_atomic, same_contents, write_atomic, write_text_atomic
+
+
+class TestWriter(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.dest = self.root / "page.html"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def leftovers(self):
+        return list(self.root.glob(".*.tmp"))
+
+    def test_write_atomic(self):
+        self.assertTrue(write_atomic(self.dest, lambda f: f.write("<p>a</p>")))
+        self.assertFalse(write_atomic(self.dest, lambda f: f.write("<p>a</p>")))
+        self.assertTrue(write_atomic(self.dest, lambda f: f.write("<p>b</p>")))
+        self.assertEqual(self.dest.read_text(), "<p>b</p>")
+        self.assertEqual(self.leftovers(), [])
+
+    def test_write_atomic_error_keeps_old_file(self):
+        self.dest.write_text("old")
+
+        def fail(file):
+            file.write("partial")
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            write_atomic(self.dest, fail)
+        self.assertEqual(self.dest.read_text(), "old")
+        self.assertEqual(self.leftovers(), [])
+
+    def test_write_text_atomic(self):
+        self.assertTrue(write_text_atomic(self.dest, "é"))
+        self.assertFalse(write_text_atomic(self.dest, "é"))
+        self.assertTrue(write_text_atomic(self.dest, "e"))
+
+    def test_copy_atomic_and_same_contents(self):
+        src = self.root / "src.html"
+        src.write_text("same")
+        self.assertFalse(same_contents(src, self.dest))
+        self.assertTrue(copy_atomic(src, self.dest))
+        self.assertTrue(same_contents(src, self.dest))
+        self.assertFalse(copy_atomic(src, self.dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
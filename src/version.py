@@ -0,0 +1,36 @@
+import hashlib
+from pathlib import Path
+
+__version__ = "0.1.0"
+
+# Modules whose code determines the rendered HTML. Their source is part of
+# render cache keys, so a cache shared between branches never serves pages
+# rendered by different converter code under the same version number.
+RENDER_MODULES = (
+    "arena.py",
+    "convert.py",
+    "htmlnode.py",
+    "leafnode.py",
+    "main.py",
+    "parentnode.py",
+    "parse.py",
+    "pipeline.py",
+    "stream.py",
+    "template.py",
+    "textnode.py",
+    "writer.py",
+)
+
+_fingerprint = None
+
+
+def render_fingerprint():
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256(__version__.encode())
+        src_dir = Path(__file__).parent
+        for name in RENDER_MODULES:
+            digest.update(name.encode())
+            digest.update((src_dir / name).read_bytes())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
@@ -0,0 +1,73 @@
+import os
+import shutil
+import uuid
+
+
+def temp_path_for(dest_path):
+    return dest_path.with_name(f".{dest_path.name}.{uuid.uuid4().hex}.tmp")
+
+
+def same_contents(path_a, path_b, chunk_size=1 << 16):
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        with open(path_a, "rb") as file_a, open(path_b, "rb") as file_b:
+            while True:
+                chunk = file_a.read(chunk_size)
+                if chunk != file_b.read(chunk_size):
+                    return False
+                if not chunk:
+                    return True
+    except FileNotFoundError:
+        return False
+
+
+def write_atomic(dest_path, write, encoding="utf-8"):
+    # Calls write(file) on a temp file next to dest_path, then renames it
+    # over dest_path unless the bytes are identical to what is already
+    # there, so unchanged outputs keep their mtime. Returns True if
+    # dest_path was replaced.
+    tmp_path = temp_path_for(dest_path)
+    try:
+        with open(tmp_path, "w", encoding=encoding) as file:
+            write(file)
+        if same_contents(tmp_path, dest_path):
+            return False
+        os.replace(tmp_path, dest_path)
+        return True
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_text_atomic(dest_path, text, encoding="utf-8"):
+    return write_bytes_atomic(dest_path, text.encode(encoding))
+
+
+def write_bytes_atomic(dest_path, data):
+    try:
+        if os.path.getsize(dest_path) == len(data):
+            with open(dest_path, "rb") as file:
+                if file.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+    tmp_path = temp_path_for(dest_path)
+    try:
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, dest_path)
+        return True
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def copy_atomic(src_path, dest_path):
+    if same_contents(src_path, dest_path):
+        return False
+    tmp_path = temp_path_for(dest_path)
+    try:
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+        return True
+    finally:
+        tmp_path.unlink(missing_ok=True)